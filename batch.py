@@ -0,0 +1,165 @@
+import json
+import os
+import random
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+
+import jigcut
+import profiling
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+# Job list: a JSON array of objects like
+#   {"image": "in/cat.png", "rows": 10, "cols": 15, "seed": 7, "output": "out/cat"}
+# "seed" is optional (missing or null = a random one per job); pieces are
+# written as <output>/piece_<row>_<col>.png
+JOBS_PATH = "jobs.json"
+
+# Worker processes shared by every job (None = one per CPU)
+WORKERS = None
+
+# Decoded source images each worker keeps around between rows
+WORKER_IMAGE_CACHE = 2
+
+# Optional aggregated profile across all jobs (see jigcut.PROFILE_REPORT)
+PROFILE_REPORT = None
+
+###############################################################################
+# WORKER SIDE
+###############################################################################
+
+# Per-process cache: job key -> (image, piece_width, piece_height, tpat, spat)
+_job_cache = OrderedDict()
+
+def _job_state(job, prof):
+    """
+    Load the image and edge patterns for a job, reusing them across rows.
+    Patterns are rebuilt from the seed, so every worker agrees on them.
+    """
+    key = (job["image"], job["rows"], job["cols"], job.get("seed"))
+    state = _job_cache.get(key)
+    if state is not None:
+        _job_cache.move_to_end(key)
+        prof.count("image_cache_hits")
+        return state
+
+    with prof.stage("load"):
+        image = Image.open(job["image"]).convert("RGBA")
+    width, height = image.size
+    tpat, spat = jigcut.generate_patterns(
+        job["rows"], job["cols"], random.Random(job.get("seed"))
+    )
+    state = (image, width // job["cols"], height // job["rows"], tpat, spat)
+
+    _job_cache[key] = state
+    while len(_job_cache) > WORKER_IMAGE_CACHE:
+        _job_cache.popitem(last=False)
+    return state
+
+def render_row(job, row, profile=False):
+    """
+    Cut and save every piece in one row of a job.
+    Returns the row's profile report, or None when profiling is off.
+    """
+    prof = profiling.Profiler(enabled=profile)
+    image, pw, ph, tpat, spat = _job_state(job, prof)
+    for col in range(job["cols"]):
+        piece = jigcut.create_piece(image, row, col, pw, ph, tpat, spat, prof=prof)
+        path = os.path.join(job["output"], f"piece_{row}_{col}.png")
+        jigcut.save_piece(piece, path, prof)
+    return prof.report() if profile else None
+
+###############################################################################
+# SCHEDULING
+###############################################################################
+
+def load_jobs(path):
+    with open(path) as f:
+        return json.load(f)
+
+def job_cost(job):
+    """
+    Estimated work for a job: source pixel count (read from the header only).
+    Raises if the job is malformed or its image can't be opened.
+    """
+    for field in ("image", "rows", "cols", "output"):
+        if field not in job:
+            raise ValueError(f"missing '{field}'")
+    if job["rows"] < 1 or job["cols"] < 1:
+        raise ValueError("rows and cols must be positive")
+    with Image.open(job["image"]) as im:
+        width, height = im.size
+    return width * height
+
+def main():
+    jobs = load_jobs(JOBS_PATH)
+    prof = profiling.Profiler(enabled=bool(PROFILE_REPORT))
+
+    # Validate and size every job; a bad job fails alone
+    failed = {}
+    costs = {}
+    for i, job in enumerate(jobs):
+        try:
+            costs[i] = job_cost(job)
+            os.makedirs(job["output"], exist_ok=True)
+            # Rows go to different workers, which must all draw the same
+            # patterns, so an unseeded job gets one seed up front
+            if job.get("seed") is None:
+                job["seed"] = random.randrange(2**32)
+        except Exception as e:
+            failed[i] = e
+            print(f"Job {i} failed: {e}")
+
+    # Longest job first, so big images don't end up as the tail
+    order = sorted(costs, key=lambda i: costs[i], reverse=True)
+
+    rows_done = {i: 0 for i in order}
+    job_futures = {i: [] for i in order}
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        futures = {}
+        for i in order:
+            for row in range(jobs[i]["rows"]):
+                fut = pool.submit(render_row, jobs[i], row, prof.enabled)
+                futures[fut] = i
+                job_futures[i].append(fut)
+
+        for fut in as_completed(futures):
+            i = futures[fut]
+            if i in failed or fut.cancelled():
+                continue
+            try:
+                report = fut.result()
+            except Exception as e:
+                failed[i] = e
+                print(f"Job {i} failed: {e}")
+                for other in job_futures[i]:
+                    other.cancel()
+                continue
+            if report is not None:
+                prof.merge(report)
+            rows_done[i] += 1
+            print(f"Job {i}: row {rows_done[i]}/{jobs[i]['rows']} completed")
+            if rows_done[i] == jobs[i]["rows"]:
+                print(f"Job {i}: all pieces saved to {jobs[i]['output']}")
+
+    print(f"{len(jobs) - len(failed)}/{len(jobs)} jobs completed")
+
+    if PROFILE_REPORT:
+        prof.write_report(PROFILE_REPORT)
+        print(f"Profile report saved to {PROFILE_REPORT}")
+
+    if failed:
+        for i, e in sorted(failed.items()):
+            print(f"  job {i} ({jobs[i].get('image')}): {e}")
+        sys.exit(1)
+
+###############################################################################
+# EXECUTE
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ import os
 import random
 import math
 
+import tabs
+
 def main():
     # Configuration
     IMAGE_PATH = "diagonal_pebble_gradient.png"  # Update to your image file
@@ -13,6 +15,7 @@ def main():
     DEBUG_COLOR = (0, 0, 0)    # Black for jigsaw curves
     GRID_WIDTH = 1
     CURVE_WIDTH = 3
+    JITTER = False  # Randomise tab position, size and lean (see tabs.py)
     
     # Load the image
     try:
@@ -27,65 +30,16 @@ def main():
     grid_image = image.copy()
     draw = ImageDraw.Draw(grid_image)
     
-    # Calculate cell dimensions
-    cell_width = width // COLS
-    cell_height = height // ROWS
-    
-    # Parameters for the jigsaw tab
-    tab_height_h = min(cell_width, cell_height) * 0.25  # Horizontal tab height
-    tab_width_h = min(cell_width, cell_height) * 0.6    # Horizontal tab width
-    
-    tab_height_v = min(cell_width, cell_height) * 0.25  # Vertical tab height
-    tab_width_v = min(cell_width, cell_height) * 0.6    # Vertical tab width
-    
-    # Create a fixed pattern of innies and outies
-    # Use a deterministic pattern or random generation with fixed seed
-    random.seed(42)  # Fixed seed for reproducibility
-    
-    # Generate horizontal edge patterns (True = outie, False = innie)
-    h_edges = {}
-    v_edges = {}
-    
-    # For horizontal internal edges (ROWS-1 internal edges × COLS cells)
-    for r in range(1, ROWS):
-        for c in range(COLS):
-            # At least one innie and one outie per edge
-            h_edges[(r, c)] = random.choice([True, False])
-    
-    # For vertical internal edges (ROWS cells × COLS-1 internal edges)
-    for r in range(ROWS):
-        for c in range(1, COLS):
-            v_edges[(r, c)] = random.choice([True, False])
-    
-    # Draw horizontal edges
-    for r in range(ROWS + 1):
-        for c in range(COLS):
-            x_start = c * cell_width
-            x_end = (c + 1) * cell_width
-            y = r * cell_height
-            
-            if r == 0 or r == ROWS:
-                # Draw straight lines for the outer edges
-                draw.line([(x_start, y), (x_end, y)], fill=DEBUG_COLOR, width=CURVE_WIDTH)
-            else:
-                # Draw jigsaw curves for internal edges
-                direction = 1 if h_edges[(r, c)] else -1  # 1 = outie (tab), -1 = innie (slot)
-                draw_horizontal_edge(draw, x_start, x_end, y, direction, tab_height_h, tab_width_h, DEBUG_COLOR, CURVE_WIDTH)
-    
-    # Draw vertical edges
-    for r in range(ROWS):
-        for c in range(COLS + 1):
-            x = c * cell_width
-            y_start = r * cell_height
-            y_end = (r + 1) * cell_height
-            
-            if c == 0 or c == COLS:
-                # Draw straight lines for the outer edges
-                draw.line([(x, y_start), (x, y_end)], fill=DEBUG_COLOR, width=CURVE_WIDTH)
-            else:
-                # Draw jigsaw curves for internal edges
-                direction = 1 if v_edges[(r, c)] else -1  # 1 = outie (tab), -1 = innie (slot)
-                draw_vertical_edge(draw, x, y_start, y_end, direction, tab_height_v, tab_width_v, DEBUG_COLOR, CURVE_WIDTH)
+    # Draw every cut edge once, straight border lines and jigsaw curves.
+    # Fixed seeds for reproducibility; vector_export.py uses the same ones.
+    jitter = jitter_layout(width, height, ROWS, COLS, random.Random(43)) if JITTER else None
+    for kind, geometry in iter_cut_edges(width, height, ROWS, COLS, random.Random(42), jitter):
+        if kind == "line":
+            draw.line(list(geometry), fill=DEBUG_COLOR, width=CURVE_WIDTH)
+        else:
+            path = flatten_segments(geometry)
+            for i in range(1, len(path)):
+                draw.line([path[i-1], path[i]], fill=DEBUG_COLOR, width=CURVE_WIDTH)
     
     # Save the result
     try:
@@ -94,6 +48,88 @@ def main():
     except Exception as e:
         print(f"Error saving image: {e}")
 
+def iter_cut_edges(width, height, rows, cols, rng, jitter=None):
+    """
+    Yield every cut line of a rows x cols jigsaw layout exactly once:
+    - ("line", (p0, p1)) for the four sides of the outer border
+    - ("curve", segments) for each interior edge, segments as returned by
+      horizontal_edge_segments / vertical_edge_segments
+    Tab directions are drawn from rng one edge at a time (horizontal edges
+    row by row, then vertical edges), so nothing is kept in memory and the
+    same seed always gives the same layout.
+    jitter = optional (tab_jitter, side_jitter) from jitter_layout
+    """
+    tab_jitter, side_jitter = jitter or (None, None)
+    cell_width = width // cols
+    cell_height = height // rows
+    right = cols * cell_width
+    bottom = rows * cell_height
+    
+    # Parameters for the jigsaw tab
+    tab_height = min(cell_width, cell_height) * 0.25
+    tab_width = min(cell_width, cell_height) * 0.6
+    
+    # Straight outer border
+    yield "line", ((0, 0), (right, 0))
+    yield "line", ((right, 0), (right, bottom))
+    yield "line", ((right, bottom), (0, bottom))
+    yield "line", ((0, bottom), (0, 0))
+    
+    # Horizontal internal edges (ROWS-1 internal edges × COLS cells)
+    for r in range(1, rows):
+        y = r * cell_height
+        for c in range(cols):
+            direction = 1 if rng.choice([True, False]) else -1  # 1 = outie (tab), -1 = innie (slot)
+            yield "curve", horizontal_edge_segments(
+                c * cell_width, (c + 1) * cell_width, y, direction, tab_height, tab_width,
+                tab_jitter[r][c] if tab_jitter else tabs.CENTERED
+            )
+    
+    # Vertical internal edges (ROWS cells × COLS-1 internal edges)
+    for r in range(rows):
+        for c in range(1, cols):
+            direction = 1 if rng.choice([True, False]) else -1
+            yield "curve", vertical_edge_segments(
+                c * cell_width, r * cell_height, (r + 1) * cell_height, direction, tab_height, tab_width,
+                side_jitter[r][c] if side_jitter else tabs.CENTERED
+            )
+
+def jitter_layout(width, height, rows, cols, rng):
+    """
+    Pick a tabs.TabJitter for every interior edge of the layout so tabs vary
+    in position, size and lean without running into each other.
+    Returns (tab_jitter, side_jitter) for iter_cut_edges.
+    """
+    cell_width = width // cols
+    cell_height = height // rows
+    tab_height = min(cell_width, cell_height) * 0.25
+    tab_width = min(cell_width, cell_height) * 0.6
+
+    # Directions are drawn later, so check both; a coarse flattening is
+    # plenty since every point is padded by the clearance anyway
+    def outlines(horizontal, r, c, jitter):
+        if horizontal:
+            x, y = c * cell_width, r * cell_height
+            return [
+                flatten_segments(horizontal_edge_segments(
+                    x, x + cell_width, y, d, tab_height, tab_width, jitter
+                ), steps=8)
+                for d in (1, -1)
+            ]
+        x, y = c * cell_width, r * cell_height
+        return [
+            flatten_segments(vertical_edge_segments(
+                x, y, y + cell_height, d, tab_height, tab_width, jitter
+            ), steps=8)
+            for d in (1, -1)
+        ]
+
+    return tabs.jitter_tabs(
+        rows, cols, outlines, rng,
+        clearance=min(cell_width, cell_height) * 0.02,
+        cell_size=min(cell_width, cell_height) / 2,
+    )
+
 def draw_horizontal_edge(draw, x_start, x_end, y, direction, tab_height, tab_width, color, width):
     """
     Draw horizontal jigsaw edge (either tab or slot)
@@ -108,8 +144,44 @@ def draw_horizontal_edge(draw, x_start, x_end, y, direction, tab_height, tab_wid
     - color: line color
     - width: line width
     """
+    path = flatten_segments(horizontal_edge_segments(x_start, x_end, y, direction, tab_height, tab_width))
+    
+    # Draw the path
+    for i in range(1, len(path)):
+        draw.line([path[i-1], path[i]], fill=color, width=width)
+
+def draw_vertical_edge(draw, x, y_start, y_end, direction, tab_height, tab_width, color, width):
+    """
+    Draw vertical jigsaw edge (either tab or slot)
+    
+    Parameters:
+    - draw: ImageDraw object
+    - x: x-coordinate of the edge
+    - y_start, y_end: start and end y-coordinates
+    - direction: 1 for tab (outie), -1 for slot (innie)
+    - tab_height: height of tab/slot (actually width in vertical edges)
+    - tab_width: width of tab/slot section (actually height in vertical edges)
+    - color: line color
+    - width: line width
+    """
+    path = flatten_segments(vertical_edge_segments(x, y_start, y_end, direction, tab_height, tab_width))
+    
+    # Draw the path
+    for i in range(1, len(path)):
+        draw.line([path[i-1], path[i]], fill=color, width=width)
+
+def horizontal_edge_segments(x_start, x_end, y, direction, tab_height, tab_width,
+                             jitter=tabs.CENTERED):
+    """
+    Return the cubic Bézier segments of a horizontal jigsaw edge
+    from (x_start, y) to (x_end, y). Parameters as in draw_horizontal_edge,
+    plus jitter = tabs.TabJitter moving, resizing and leaning the tab.
+    """
+    tab_height *= jitter.scale
+    tab_width *= jitter.scale
+    
     # Calculate points
-    mid_x = (x_start + x_end) / 2
+    mid_x = x_start + (x_end - x_start) * (0.5 + jitter.offset)
     tab_y = y - (direction * tab_height)  # Peak of tab or slot
     
     # Junction points - where curves meet
@@ -139,65 +211,56 @@ def draw_horizontal_edge(draw, x_start, x_end, y, direction, tab_height, tab_wid
     j2_out_x = j2_x + vector_len * math.cos(math.radians(slope_angle))  # Right of junction
     j2_out_y = j2_y + direction * vector_len * math.sin(math.radians(slope_angle))  # Below/above junction
     
-    # Define the path
-    path = [(x_start, y)]
-    
-    # First Bézier - from start to first junction
-    bezier1 = bezier_points(
-        (x_start, y),  # Start point
-        (x_start + tab_width*0.25, y),  # First control - horizontal out
-        (j1_in_x, j1_in_y),  # Second control - leading into junction
-        (j1_x, j1_y)  # End at first junction
-    )
-    path.extend(bezier1[1:])
-    
-    # Second Bézier - middle-left curve to peak
-    bezier2 = bezier_points(
-        (j1_x, j1_y),  # Start at first junction
-        (j1_out_x, j1_out_y),  # First control - leading out of junction
-        (mid_x - tab_width*0.3, tab_y + direction*tab_height*0.1),  # Second control
-        (mid_x, tab_y)  # End at top/bottom center
-    )
-    path.extend(bezier2[1:])
-    
-    # Third Bézier - middle-right curve from peak to second junction
-    bezier3 = bezier_points(
-        (mid_x, tab_y),  # Start at top/bottom center
-        (mid_x + tab_width*0.3, tab_y + direction*tab_height*0.1),  # First control
-        (j2_in_x, j2_in_y),  # Second control - leading into junction
-        (j2_x, j2_y)  # End at second junction
-    )
-    path.extend(bezier3[1:])
-    
-    # Fourth Bézier - from second junction to end
-    bezier4 = bezier_points(
-        (j2_x, j2_y),  # Start at second junction
-        (j2_out_x, j2_out_y),  # First control - leading out of junction
-        (x_end - tab_width*0.25, y),  # Second control - horizontal in
-        (x_end, y)  # End point
-    )
-    path.extend(bezier4[1:])
-    
-    # Draw the path
-    for i in range(1, len(path)):
-        draw.line([path[i-1], path[i]], fill=color, width=width)
+    # The four cubic Bézier segments, each (start, control1, control2, end)
+    segments = [
+        # First Bézier - from start to first junction
+        (
+            (x_start, y),  # Start point
+            (x_start + tab_width*0.25, y),  # First control - horizontal out
+            (j1_in_x, j1_in_y),  # Second control - leading into junction
+            (j1_x, j1_y)  # End at first junction
+        ),
 
-def draw_vertical_edge(draw, x, y_start, y_end, direction, tab_height, tab_width, color, width):
+        # Second Bézier - middle-left curve to peak
+        (
+            (j1_x, j1_y),  # Start at first junction
+            (j1_out_x, j1_out_y),  # First control - leading out of junction
+            (mid_x - tab_width*0.3, tab_y + direction*tab_height*0.1),  # Second control
+            (mid_x, tab_y)  # End at top/bottom center
+        ),
+
+        # Third Bézier - middle-right curve from peak to second junction
+        (
+            (mid_x, tab_y),  # Start at top/bottom center
+            (mid_x + tab_width*0.3, tab_y + direction*tab_height*0.1),  # First control
+            (j2_in_x, j2_in_y),  # Second control - leading into junction
+            (j2_x, j2_y)  # End at second junction
+        ),
+
+        # Fourth Bézier - from second junction to end
+        (
+            (j2_x, j2_y),  # Start at second junction
+            (j2_out_x, j2_out_y),  # First control - leading out of junction
+            (x_end - tab_width*0.25, y),  # Second control - horizontal in
+            (x_end, y)  # End point
+        ),
+    ]
+    
+    # Leaning is a shear, so shearing the control points shears the curve
+    return [tuple(tabs.lean(seg, True, y, jitter.skew)) for seg in segments]
+
+def vertical_edge_segments(x, y_start, y_end, direction, tab_height, tab_width,
+                           jitter=tabs.CENTERED):
     """
-    Draw vertical jigsaw edge (either tab or slot)
-    
-    Parameters:
-    - draw: ImageDraw object
-    - x: x-coordinate of the edge
-    - y_start, y_end: start and end y-coordinates
-    - direction: 1 for tab (outie), -1 for slot (innie)
-    - tab_height: height of tab/slot (actually width in vertical edges)
-    - tab_width: width of tab/slot section (actually height in vertical edges)
-    - color: line color
-    - width: line width
+    Return the cubic Bézier segments of a vertical jigsaw edge
+    from (x, y_start) to (x, y_end). Parameters as in draw_vertical_edge,
+    plus jitter = tabs.TabJitter moving, resizing and leaning the tab.
     """
+    tab_height *= jitter.scale
+    tab_width *= jitter.scale
+    
     # Calculate points
-    mid_y = (y_start + y_end) / 2
+    mid_y = y_start + (y_end - y_start) * (0.5 + jitter.offset)
     tab_x = x - (direction * tab_height)  # Peak of tab or slot
     
     # Junction points - where curves meet
@@ -226,48 +289,52 @@ def draw_vertical_edge(draw, x, y_start, y_end, direction, tab_height, tab_width
     j2_out_y = j2_y + vector_len * math.cos(math.radians(slope_angle))
     j2_out_x = j2_x + direction * vector_len * math.sin(math.radians(slope_angle))
     
-    # Define the path
-    path = [(x, y_start)]
-    
-    # First Bézier - from start to first junction
-    bezier1 = bezier_points(
-        (x, y_start),  # Start point
-        (x, y_start + tab_width*0.25),  # First control - vertical down
-        (j1_in_x, j1_in_y),  # Second control - leading into junction
-        (j1_x, j1_y)  # End at first junction
-    )
-    path.extend(bezier1[1:])
-    
-    # Second Bézier - middle-top curve to peak
-    bezier2 = bezier_points(
-        (j1_x, j1_y),  # Start at first junction
-        (j1_out_x, j1_out_y),  # First control - leading out of junction
-        (tab_x + direction*tab_height*0.1, mid_y - tab_width*0.3),  # Second control
-        (tab_x, mid_y)  # End at left/right center
-    )
-    path.extend(bezier2[1:])
-    
-    # Third Bézier - middle-bottom curve from peak to second junction
-    bezier3 = bezier_points(
-        (tab_x, mid_y),  # Start at left/right center
-        (tab_x + direction*tab_height*0.1, mid_y + tab_width*0.3),  # First control
-        (j2_in_x, j2_in_y),  # Second control - leading into junction
-        (j2_x, j2_y)  # End at second junction
-    )
-    path.extend(bezier3[1:])
-    
-    # Fourth Bézier - from second junction to end
-    bezier4 = bezier_points(
-        (j2_x, j2_y),  # Start at second junction
-        (j2_out_x, j2_out_y),  # First control - leading out of junction
-        (x, y_end - tab_width*0.25),  # Second control - vertical up
-        (x, y_end)  # End point
-    )
-    path.extend(bezier4[1:])
-    
-    # Draw the path
-    for i in range(1, len(path)):
-        draw.line([path[i-1], path[i]], fill=color, width=width)
+    # The four cubic Bézier segments, each (start, control1, control2, end)
+    segments = [
+        # First Bézier - from start to first junction
+        (
+            (x, y_start),  # Start point
+            (x, y_start + tab_width*0.25),  # First control - vertical down
+            (j1_in_x, j1_in_y),  # Second control - leading into junction
+            (j1_x, j1_y)  # End at first junction
+        ),
+
+        # Second Bézier - middle-top curve to peak
+        (
+            (j1_x, j1_y),  # Start at first junction
+            (j1_out_x, j1_out_y),  # First control - leading out of junction
+            (tab_x + direction*tab_height*0.1, mid_y - tab_width*0.3),  # Second control
+            (tab_x, mid_y)  # End at left/right center
+        ),
+
+        # Third Bézier - middle-bottom curve from peak to second junction
+        (
+            (tab_x, mid_y),  # Start at left/right center
+            (tab_x + direction*tab_height*0.1, mid_y + tab_width*0.3),  # First control
+            (j2_in_x, j2_in_y),  # Second control - leading into junction
+            (j2_x, j2_y)  # End at second junction
+        ),
+
+        # Fourth Bézier - from second junction to end
+        (
+            (j2_x, j2_y),  # Start at second junction
+            (j2_out_x, j2_out_y),  # First control - leading out of junction
+            (x, y_end - tab_width*0.25),  # Second control - vertical up
+            (x, y_end)  # End point
+        ),
+    ]
+    
+    # Leaning is a shear, so shearing the control points shears the curve
+    return [tuple(tabs.lean(seg, False, x, jitter.skew)) for seg in segments]
+
+def flatten_segments(segments, steps=20):
+    """
+    Turn a list of cubic Bézier segments into one continuous list of points.
+    """
+    path = [segments[0][0]]
+    for p0, p1, p2, p3 in segments:
+        path.extend(bezier_points(p0, p1, p2, p3, steps)[1:])
+    return path
 
 def bezier_points(p0, p1, p2, p3, steps=20):
     """
@@ -0,0 +1,123 @@
+import random
+import sys
+
+import jigcut
+import tabs
+from spatial import SpatialHash, boxes_overlap, points_box
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+# Layouts to cut with jittered tabs: (rows, cols, piece width, piece height)
+LAYOUTS = [
+    (10, 10, 100, 100),
+    (25, 25, 100, 100),
+    (8, 8, 75, 62),
+    (12, 7, 50, 80),
+]
+SEEDS = range(5)
+
+###############################################################################
+# CROSSINGS
+###############################################################################
+
+def segments_cross(a, b, c, d):
+    """
+    True if segments a-b and c-d cross at a point inside both. Segments that
+    only touch (at a shared corner, say) don't count.
+    """
+    def orient(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+    return (
+        orient(a, b, c) * orient(a, b, d) < 0
+        and orient(c, d, a) * orient(c, d, b) < 0
+    )
+
+def crossing_pairs(polylines, cell_size):
+    """
+    Return the set of (i, j), i < j, for which polylines[i] and polylines[j]
+    cross. Polylines meet through a SpatialHash of their boxes, and only the
+    segments inside both boxes are tested against each other.
+    """
+    index = SpatialHash(cell_size)
+    segments = [
+        [(points_box(s), s) for s in zip(polyline, polyline[1:])]
+        for polyline in polylines
+    ]
+    boxes = [points_box(polyline) for polyline in polylines]
+    pairs = set()
+    for i, box in enumerate(boxes):
+        for j in index.query(box):
+            other = boxes[j]
+            both = (
+                max(box[0], other[0]), max(box[1], other[1]),
+                min(box[2], other[2]), min(box[3], other[3]),
+            )
+            mine = [s for b, s in segments[i] if boxes_overlap(b, both)]
+            if not mine:
+                continue
+            theirs = [s for b, s in segments[j] if boxes_overlap(b, both)]
+            if any(segments_cross(a, b, c, d) for a, b in mine for c, d in theirs):
+                pairs.add((j, i))
+        index.insert(box, i)
+    return pairs
+
+def edge_polylines(rows, cols, pw, ph, tpat, spat, tjit=None, sjit=None):
+    """
+    Every interior edge of a jigcut layout as a corner-to-corner polyline,
+    in a fixed order (horizontal edges, then vertical ones).
+    """
+    tab_size = min(pw, ph) * jigcut.TAB_FRACTION
+    polylines = []
+    for r in range(1, rows):
+        for c in range(cols):
+            jitter = tjit[r][c] if tjit else tabs.CENTERED
+            polylines.append(jigcut.edge_top(c * pw, r * ph, pw, tpat[r][c], tab_size, jitter))
+    for r in range(rows):
+        for c in range(1, cols):
+            jitter = sjit[r][c] if sjit else tabs.CENTERED
+            x, y = c * pw, r * ph
+            # edge_left runs upwards without its start corner
+            left = jigcut.edge_left(x, y, ph, spat[r][c], tab_size, jitter)
+            polylines.append([(x, y + ph)] + left)
+    return polylines
+
+###############################################################################
+# CHECK
+###############################################################################
+
+def main():
+    """
+    Cut every layout with jitter and report tabs that cross. Arcs sized for
+    the shorter side can already cross on non-square pieces without any
+    jitter, so only crossings the jitter added count.
+    """
+    failed = 0
+    for rows, cols, pw, ph in LAYOUTS:
+        for seed in SEEDS:
+            rng = random.Random(seed)
+            tpat, spat = jigcut.generate_patterns(rows, cols, rng)
+            tjit, sjit = jigcut.jitter_patterns(rows, cols, pw, ph, tpat, spat, rng)
+
+            cell_size = min(pw, ph)
+            jittered = crossing_pairs(
+                edge_polylines(rows, cols, pw, ph, tpat, spat, tjit, sjit), cell_size
+            )
+            centred = crossing_pairs(edge_polylines(rows, cols, pw, ph, tpat, spat), cell_size)
+            added = len(jittered - centred)
+            if added:
+                failed += 1
+            print(f"{rows}x{cols} of {pw}x{ph}, seed {seed}: {added} crossings added by jitter")
+
+    if failed:
+        print(f"{failed} layouts with crossing tabs")
+        sys.exit(1)
+    print("No jittered tabs cross")
+
+###############################################################################
+# EXECUTE
+###############################################################################
+
+if __name__ == "__main__":
+    main()
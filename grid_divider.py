@@ -28,21 +28,13 @@ def main():
     grid_image = image.copy()
     draw = ImageDraw.Draw(grid_image)
 
-    # Calculate cell dimensions
-    cell_width = width // COLS
-    cell_height = height // ROWS
-
-    # Draw horizontal grid lines
-    for r in range(1, ROWS):
-        y = r * cell_height
-        draw.line([(0, y), (width, y)], fill=LINE_COLOR, width=LINE_WIDTH)
-        print(f"Drawing horizontal line at y={y}")
-
-    # Draw vertical grid lines
-    for c in range(1, COLS):
-        x = c * cell_width
-        draw.line([(x, 0), (x, height)], fill=LINE_COLOR, width=LINE_WIDTH)
-        print(f"Drawing vertical line at x={x}")
+    # Draw the grid lines
+    for _, (p0, p1) in iter_grid_lines(width, height, ROWS, COLS):
+        draw.line([p0, p1], fill=LINE_COLOR, width=LINE_WIDTH)
+        if p0[1] == p1[1]:
+            print(f"Drawing horizontal line at y={p0[1]}")
+        else:
+            print(f"Drawing vertical line at x={p0[0]}")
 
     # Save the result
     try:
@@ -51,6 +43,25 @@ def main():
     except Exception as e:
         print(f"Error saving image: {e}")
 
+def iter_grid_lines(width, height, rows, cols):
+    """
+    Yield the interior grid lines as ("line", (p0, p1)), horizontal lines
+    first, in the same form as bezier_divider.iter_cut_edges.
+    """
+    # Calculate cell dimensions
+    cell_width = width // cols
+    cell_height = height // rows
+
+    # Horizontal grid lines
+    for r in range(1, rows):
+        y = r * cell_height
+        yield "line", ((0, y), (width, y))
+
+    # Vertical grid lines
+    for c in range(1, cols):
+        x = c * cell_width
+        yield "line", ((x, 0), (x, height))
+
 if __name__ == "__main__":
     main()
 
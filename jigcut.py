@@ -3,6 +3,10 @@ import random
 import os
 from PIL import Image, ImageDraw
 
+import profiling
+import signatures
+import tabs
+
 ###############################################################################
 # CONFIGURATION
 ###############################################################################
@@ -11,6 +15,20 @@ IMAGE_PATH = "diagonal_pebble_gradient.png"  # Update to your image file
 OUTPUT_DIR = "jigsaw_pieces"
 ROWS = 5
 COLS = 5
+SEED = None  # Set to an int for a reproducible cut
+
+# Randomise tab position, size and lean (see tabs.py) instead of centring them
+JITTER = False
+
+# "png" = one PNG per piece; "npy" = every piece in one memory-mappable
+# pieces.npy stack (N x tile height x tile width x RGBA) plus pieces_index.npy
+# with each piece's row, col, byte offset, size and edge types (stack_export.py).
+# "npy" needs numpy installed (pip install numpy); "png" only needs Pillow.
+OUTPUT_FORMAT = "png"
+
+# Also write edges.json: type, tab centre and sampled profile of every piece
+# edge, for building a signatures.EdgeIndex (which piece fits this edge?)
+EDGE_INDEX = False
 
 # How large each "knob" or "tab" should be, as fraction of the piece dimension
 TAB_FRACTION = 0.25
@@ -18,6 +36,10 @@ TAB_FRACTION = 0.25
 # How many line segments to approximate the arc
 ARC_STEPS = 20
 
+# Optional profiling output (None = profiling disabled, no overhead)
+PROFILE_REPORT = None    # e.g. "profile.json": per-stage times and counters
+PROFILE_TRACE = None     # e.g. "trace.json": open in chrome://tracing
+
 ###############################################################################
 # HELPER FUNCTIONS
 ###############################################################################
@@ -41,8 +63,14 @@ def arc_points(cx, cy, radius, start_deg, end_deg, steps=ARC_STEPS):
 ###############################################################################
 
 def main():
+    prof = profiling.Profiler(
+        enabled=bool(PROFILE_REPORT or PROFILE_TRACE),
+        trace=bool(PROFILE_TRACE),
+    )
+
     # Load image
-    image = Image.open(IMAGE_PATH).convert("RGBA")
+    with prof.stage("load"):
+        image = Image.open(IMAGE_PATH).convert("RGBA")
     width, height = image.size
     
     # Compute piece sizes
@@ -53,24 +81,22 @@ def main():
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
     # Create patterns (top/bottom edges, left/right edges)
-    #  0 = flat, +1 = outward knob, -1 = inward slot
-    tab_patterns = {}
-    for r in range(ROWS + 1):
-        tab_patterns[r] = {}
-        for c in range(COLS):
-            if r == 0 or r == ROWS:
-                tab_patterns[r][c] = 0
-            else:
-                tab_patterns[r][c] = random.choice([-1, 1])
-                
-    side_patterns = {}
-    for r in range(ROWS):
-        side_patterns[r] = {}
-        for c in range(COLS + 1):
-            if c == 0 or c == COLS:
-                side_patterns[r][c] = 0
-            else:
-                side_patterns[r][c] = random.choice([-1, 1])
+    rng = random.Random(SEED)
+    tab_patterns, side_patterns = generate_patterns(ROWS, COLS, rng)
+    tab_jitter = side_jitter = None
+    if JITTER:
+        tab_jitter, side_jitter = jitter_patterns(
+            ROWS, COLS, piece_width, piece_height, tab_patterns, side_patterns, rng
+        )
+    
+    stack = None
+    if OUTPUT_FORMAT == "npy":
+        import stack_export  # needs numpy
+        buffer = piece_buffer(piece_width, piece_height, JITTER)
+        stack = stack_export.PieceStack(
+            os.path.join(OUTPUT_DIR, stack_export.STACK_NAME), ROWS * COLS,
+            piece_height + 2 * buffer, piece_width + 2 * buffer
+        )
     
     # Generate every puzzle piece
     for row in range(ROWS):
@@ -78,44 +104,189 @@ def main():
             piece = create_piece(
                 image, row, col, 
                 piece_width, piece_height, 
-                tab_patterns, side_patterns
+                tab_patterns, side_patterns,
+                tab_jitter, side_jitter,
+                prof=prof
             )
-            piece.save(os.path.join(OUTPUT_DIR, f"piece_{row}_{col}.png"))
+            if stack is not None:
+                edges = piece_edge_types(row, col, tab_patterns, side_patterns)
+                stack.add(piece, row, col, edges, prof)
+            else:
+                save_piece(piece, os.path.join(OUTPUT_DIR, f"piece_{row}_{col}.png"), prof)
         print(f"Row {row + 1}/{ROWS} completed")
     
+    if stack is not None:
+        stack.close(os.path.join(OUTPUT_DIR, stack_export.INDEX_NAME))
+    if EDGE_INDEX:
+        descriptors = piece_descriptors(
+            ROWS, COLS, piece_width, piece_height,
+            tab_patterns, side_patterns, tab_jitter, side_jitter
+        )
+        signatures.write_descriptors(os.path.join(OUTPUT_DIR, "edges.json"), descriptors)
     print(f"All pieces saved to {OUTPUT_DIR}")
 
-def create_piece(image, row, col, pw, ph, tpat, spat):
+    if PROFILE_REPORT:
+        prof.write_report(PROFILE_REPORT)
+        print(f"Profile report saved to {PROFILE_REPORT}")
+    if PROFILE_TRACE:
+        prof.write_trace(PROFILE_TRACE)
+        print(f"Profile trace saved to {PROFILE_TRACE}")
+
+def generate_patterns(rows, cols, rng=random):
+    """
+    Pick a tab direction for every edge of a rows x cols grid.
+    Returns (tab_patterns, side_patterns):
+    tab_patterns[r][c]  = top edge of piece (r, c), r in 0..rows
+    side_patterns[r][c] = left edge of piece (r, c), c in 0..cols
+    0 = flat, +1 = outward knob, -1 = inward slot
+    """
+    tab_patterns = {}
+    for r in range(rows + 1):
+        tab_patterns[r] = {}
+        for c in range(cols):
+            if r == 0 or r == rows:
+                tab_patterns[r][c] = 0
+            else:
+                tab_patterns[r][c] = rng.choice([-1, 1])
+                
+    side_patterns = {}
+    for r in range(rows):
+        side_patterns[r] = {}
+        for c in range(cols + 1):
+            if c == 0 or c == cols:
+                side_patterns[r][c] = 0
+            else:
+                side_patterns[r][c] = rng.choice([-1, 1])
+
+    return tab_patterns, side_patterns
+
+def jitter_patterns(rows, cols, pw, ph, tpat, spat, rng=random):
+    """
+    Pick a tabs.TabJitter for every edge so tabs vary in position, size and
+    lean without running into each other (see tabs.jitter_tabs).
+    Returns (tab_jitter, side_jitter), indexed like generate_patterns.
+    """
+    tab_size = min(pw, ph) * TAB_FRACTION
+
+    def outlines(horizontal, r, c, jitter):
+        x, y = c * pw, r * ph
+        if horizontal:
+            return [edge_top(x, y, pw, tpat[r][c], tab_size, jitter)]
+        # edge_left runs upwards without its start corner; flip it top-down
+        return [[(x, y + ph)] + edge_left(x, y, ph, spat[r][c], tab_size, jitter)]
+
+    return tabs.jitter_tabs(
+        rows, cols, outlines, rng,
+        clearance=min(pw, ph) * 0.02,
+        cell_size=min(pw, ph) / 2,
+    )
+
+def save_piece(piece, path, prof=profiling.DISABLED):
+    """
+    Encode a piece as PNG, counting the bytes written when profiling.
+    """
+    with prof.stage("encode"):
+        piece.save(path)
+    if prof.enabled:
+        prof.count("pieces")
+        prof.count("bytes_written", os.path.getsize(path))
+
+def piece_buffer(pw, ph, jittered=False):
+    """
+    Margin around the piece rectangle on its canvas, so outward knobs fit.
+    """
+    buffer = int(min(pw, ph) * 0.5)  # bigger buffer ensures arcs won't get cut
+    if jittered:
+        buffer = int(buffer * (1 + tabs.SIZE_JITTER))  # jittered tabs can be larger
+    return buffer
+
+def piece_edge_types(row, col, tpat, spat):
+    """
+    Return (top, right, bottom, left) edge types as seen from piece (row, col):
+    0=flat, +1=outward, -1=inward
+    """
+    top_type = tpat[row][col]
+    bottom_type = tpat[row + 1][col]    # next row
+    left_type = spat[row][col]
+    right_type = spat[row][col + 1]     # next col
+
+    # For bottom & right, invert (so adjacent pieces match)
+    bottom_type = -bottom_type if bottom_type != 0 else 0
+    right_type = -right_type if right_type != 0 else 0
+    return top_type, right_type, bottom_type, left_type
+
+def piece_descriptors(rows, cols, pw, ph, tpat, spat, tjit=None, sjit=None):
+    """
+    Describe the four edges of every piece for matching (see signatures.py).
+    Each shared edge is traced once and mirrored for the neighbouring piece,
+    so the two descriptors of an edge always fit each other exactly.
+    Returns {(row, col): (top, right, bottom, left)}.
+    """
+    tab_size = min(pw, ph) * TAB_FRACTION
+
+    # Edges as the top side of the piece below them (walked left to right)
+    top = {}
+    for r in range(rows + 1):
+        for c in range(cols):
+            jit = tjit[r][c] if tjit else tabs.CENTERED
+            edge_type = tpat[r][c]
+            path = edge_top(c * pw, r * ph, pw, edge_type, tab_size, jit)
+            center = 0.5 + jit.offset if edge_type else 0.5
+            top[r, c] = signatures.EdgeDescriptor(edge_type, center, signatures.edge_profile(path))
+
+    # Edges as the left side of the piece to their right (walked bottom to top)
+    left = {}
+    for r in range(rows):
+        for c in range(cols + 1):
+            jit = sjit[r][c] if sjit else tabs.CENTERED
+            edge_type = spat[r][c]
+            x, y = c * pw, r * ph
+            path = [(x, y + ph)] + edge_left(x, y, ph, edge_type, tab_size, jit)
+            center = 0.5 - jit.offset if edge_type else 0.5
+            left[r, c] = signatures.EdgeDescriptor(edge_type, center, signatures.edge_profile(path))
+
+    mate = signatures.mate_descriptor
+    return {
+        (r, c): (top[r, c], mate(left[r, c + 1]), mate(top[r + 1, c]), left[r, c])
+        for r in range(rows)
+        for c in range(cols)
+    }
+
+def create_piece(image, row, col, pw, ph, tpat, spat, tjit=None, sjit=None,
+                 prof=profiling.DISABLED):
     """
     Create a single puzzle piece using arcs for curved tabs.
     row, col = which piece in puzzle grid
     pw, ph = piece width/height
     tpat = tab_patterns
     spat = side_patterns
+    tjit, sjit = optional tab/side jitter from jitter_patterns (None = centred)
+    prof = optional profiling.Profiler for stage timings
     """
     # Coordinates for the piece in the source image
     x1, y1 = col * pw, row * ph
     x2, y2 = x1 + pw, y1 + ph
     
     # We add a buffer so that outward knobs fit
-    buffer = int(min(pw, ph) * 0.5)  # bigger buffer ensures arcs won't get cut
+    buffer = piece_buffer(pw, ph, bool(tjit))
     canvas_width = pw + 2 * buffer
     canvas_height = ph + 2 * buffer
     
     # Create new canvas & mask
-    canvas = Image.new("RGBA", (canvas_width, canvas_height), (0, 0, 0, 0))
-    mask = Image.new("L", (canvas_width, canvas_height), 0)
-    draw = ImageDraw.Draw(mask)
+    with prof.stage("canvas"):
+        canvas = Image.new("RGBA", (canvas_width, canvas_height), (0, 0, 0, 0))
+        mask = Image.new("L", (canvas_width, canvas_height), 0)
+        draw = ImageDraw.Draw(mask)
     
     # Edge definitions
-    top_type = tpat[row][col]           # 0=flat, +1=outward, -1=inward
-    bottom_type = tpat[row + 1][col]    # next row
-    left_type = spat[row][col]          # 0=flat, +1=outward, -1=inward
-    right_type = spat[row][col + 1]     # next col
+    top_type, right_type, bottom_type, left_type = piece_edge_types(row, col, tpat, spat)
 
-    # For bottom & right, invert (so adjacent pieces match)
-    bottom_type = -bottom_type if bottom_type != 0 else 0
-    right_type = -right_type if right_type != 0 else 0
+    # Position, size and lean of each tab
+    if tjit:
+        top_jit, bottom_jit = tjit[row][col], tjit[row + 1][col]
+        left_jit, right_jit = sjit[row][col], sjit[row][col + 1]
+    else:
+        top_jit = bottom_jit = left_jit = right_jit = tabs.CENTERED
 
     # "Knob" or "tab" size
     tab_size = min(pw, ph) * TAB_FRACTION
@@ -127,31 +298,38 @@ def create_piece(image, row, col, pw, ph, tpat, spat):
     path = []
     
     # Add each edge's points to the path
-    top_edge = edge_top(buffer, buffer, pw, top_type, tab_size)
-    right_edge = edge_right(buffer + pw, buffer, ph, right_type, tab_size)
-    bottom_edge = edge_bottom(buffer, buffer + ph, pw, bottom_type, tab_size)
-    left_edge = edge_left(buffer, buffer, ph, left_type, tab_size)
+    with prof.stage("path"):
+        top_edge = edge_top(buffer, buffer, pw, top_type, tab_size, top_jit)
+        right_edge = edge_right(buffer + pw, buffer, ph, right_type, tab_size, right_jit)
+        bottom_edge = edge_bottom(buffer, buffer + ph, pw, bottom_type, tab_size, bottom_jit)
+        left_edge = edge_left(buffer, buffer, ph, left_type, tab_size, left_jit)
     
-    # Combine all edges to create the full path
-    path = top_edge + right_edge + bottom_edge + left_edge
+        # Combine all edges to create the full path
+        path = top_edge + right_edge + bottom_edge + left_edge
+    prof.count("vertices", len(path))
     
     # Draw the polygon
-    draw.polygon(path, fill=255)
+    with prof.stage("rasterize"):
+        draw.polygon(path, fill=255)
     
     # Copy the piece from original image
-    piece_im = image.crop((x1, y1, x2, y2))
-    canvas.paste(piece_im, (buffer, buffer))
-    canvas.putalpha(mask)
+    with prof.stage("crop"):
+        piece_im = image.crop((x1, y1, x2, y2))
+    with prof.stage("paste"):
+        canvas.paste(piece_im, (buffer, buffer))
+    with prof.stage("putalpha"):
+        canvas.putalpha(mask)
     return canvas
 
 ###############################################################################
 # EDGE SHAPES
 ###############################################################################
 
-def edge_top(x_left, y_top, width_px, edge_type, tab_size):
+def edge_top(x_left, y_top, width_px, edge_type, tab_size, jitter=tabs.CENTERED):
     """
     Return a list of points from (x_left, y_top) to (x_left+width_px, y_top)
     with a possible half-circle arc in the middle if edge_type != 0.
+    jitter = tabs.TabJitter moving, resizing and leaning the arc
     """
     # Start list with top-left corner
     pts = [(x_left, y_top)]
@@ -162,17 +340,18 @@ def edge_top(x_left, y_top, width_px, edge_type, tab_size):
         pts.append((x_right, y_top))
 
     else:
-        mid_x = (x_left + x_right) / 2
+        mid_x = x_left + width_px * (0.5 + jitter.offset)
+        tab_size = tab_size * jitter.scale
         # The arc center is above (for outward=+1) or below (for inward=-1)
         arc_center_y = y_top - tab_size if edge_type == 1 else y_top + tab_size
         radius = abs(tab_size)
 
         # Move from left corner to ~1/4 across
-        quarter_x = x_left + width_px / 4
+        quarter_x = mid_x - width_px / 4 * jitter.scale
         pts.append((quarter_x, y_top))
 
         # Arc from quarter_x to three_quarter_x 
-        three_quarter_x = x_left + 3 * width_px / 4
+        three_quarter_x = mid_x + width_px / 4 * jitter.scale
         if edge_type == 1:
             # outward
             arc = arc_points(
@@ -189,7 +368,7 @@ def edge_top(x_left, y_top, width_px, edge_type, tab_size):
                 0, 180,
                 steps=ARC_STEPS
             )
-        pts.extend(arc)
+        pts.extend(tabs.lean(arc, True, y_top, jitter.skew))
 
         # Then go to top-right corner
         pts.append((three_quarter_x, y_top))
@@ -197,7 +376,7 @@ def edge_top(x_left, y_top, width_px, edge_type, tab_size):
 
     return pts
 
-def edge_right(x_right, y_top, height_px, edge_type, tab_size):
+def edge_right(x_right, y_top, height_px, edge_type, tab_size, jitter=tabs.CENTERED):
     """
     Return a list of points going down the right edge.
     """
@@ -207,23 +386,24 @@ def edge_right(x_right, y_top, height_px, edge_type, tab_size):
     if edge_type == 0:
         pts.append((x_right, y_bottom))
     else:
-        mid_y = (y_top + y_bottom) / 2
+        mid_y = y_top + height_px * (0.5 + jitter.offset)
+        tab_size = tab_size * jitter.scale
         arc_center_x = x_right + tab_size if edge_type == 1 else x_right - tab_size
         radius = abs(tab_size)
 
         # Move down ~1/4
-        quarter_y = y_top + height_px / 4
+        quarter_y = mid_y - height_px / 4 * jitter.scale
         pts.append((x_right, quarter_y))
 
         # Arc from quarter_y to three_quarter_y
-        three_quarter_y = y_top + 3 * height_px / 4
+        three_quarter_y = mid_y + height_px / 4 * jitter.scale
         if edge_type == 1:
             # outward
             arc = arc_points(arc_center_x, mid_y, radius, 270, 90, steps=ARC_STEPS)
         else:
             # inward
             arc = arc_points(arc_center_x, mid_y, radius, 90, 270, steps=ARC_STEPS)
-        pts.extend(arc)
+        pts.extend(tabs.lean(arc, False, x_right, jitter.skew))
 
         # Then go to bottom-right corner
         pts.append((x_right, three_quarter_y))
@@ -231,34 +411,34 @@ def edge_right(x_right, y_top, height_px, edge_type, tab_size):
 
     return pts
 
-def edge_bottom(x_left, y_bottom, width_px, edge_type, tab_size):
+def edge_bottom(x_left, y_bottom, width_px, edge_type, tab_size, jitter=tabs.CENTERED):
     """
     Return points for bottom edge, right to left
     """
     pts = []
-    x_right = x_left + width_px
 
     if edge_type == 0:
         # Straight line to bottom-left
         pts.append((x_left, y_bottom))
     else:
-        mid_x = (x_left + x_right) / 2
+        mid_x = x_left + width_px * (0.5 + jitter.offset)
+        tab_size = tab_size * jitter.scale
         arc_center_y = y_bottom + tab_size if edge_type == 1 else y_bottom - tab_size
         radius = abs(tab_size)
 
         # Move ~1/4 from the right
-        quarter_x = x_right - width_px / 4
+        quarter_x = mid_x + width_px / 4 * jitter.scale
         pts.append((quarter_x, y_bottom))
 
         # Arc from quarter_x to one_quarter_x
-        one_quarter_x = x_left + width_px / 4
+        one_quarter_x = mid_x - width_px / 4 * jitter.scale
         if edge_type == 1:
             # outward
             arc = arc_points(mid_x, arc_center_y, radius, 0, 180, steps=ARC_STEPS)
         else:
             # inward
             arc = arc_points(mid_x, arc_center_y, radius, 180, 0, steps=ARC_STEPS)
-        pts.extend(arc)
+        pts.extend(tabs.lean(arc, True, y_bottom, jitter.skew))
 
         # Then to bottom-left corner
         pts.append((one_quarter_x, y_bottom))
@@ -266,21 +446,21 @@ def edge_bottom(x_left, y_bottom, width_px, edge_type, tab_size):
 
     return pts
 
-def edge_left(x_left, y_top, height_px, edge_type, tab_size):
+def edge_left(x_left, y_top, height_px, edge_type, tab_size, jitter=tabs.CENTERED):
     """
     Return points for left edge, bottom to top
     """
     pts = []
-    y_bottom = y_top + height_px
 
     if edge_type == 0:
         pts.append((x_left, y_top))
     else:
-        mid_y = (y_top + y_bottom) / 2
+        mid_y = y_top + height_px * (0.5 + jitter.offset)
+        tab_size = tab_size * jitter.scale
         arc_center_x = x_left - tab_size if edge_type == 1 else x_left + tab_size
         radius = abs(tab_size)
 
-        three_quarter_y = y_bottom - height_px / 4
+        three_quarter_y = mid_y + height_px / 4 * jitter.scale
         pts.append((x_left, three_quarter_y))
 
         if edge_type == 1:
@@ -289,9 +469,9 @@ def edge_left(x_left, y_top, height_px, edge_type, tab_size):
         else:
             # inward
             arc = arc_points(arc_center_x, mid_y, radius, 270, 90, steps=ARC_STEPS)
-        pts.extend(arc)
+        pts.extend(tabs.lean(arc, False, x_left, jitter.skew))
 
-        quarter_y = y_top + height_px / 4
+        quarter_y = mid_y - height_px / 4 * jitter.scale
         pts.append((x_left, quarter_y))
         pts.append((x_left, y_top))
 
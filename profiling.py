@@ -0,0 +1,122 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+###############################################################################
+# STAGE TIMERS AND COUNTERS
+###############################################################################
+
+# Shared no-op context returned by disabled profilers, so a disabled
+# "with prof.stage(...)" costs one attribute check and nothing else.
+_NULL_STAGE = contextlib.nullcontext()
+
+class Profiler:
+    """
+    Collect per-stage wall time and simple counters for one run.
+
+    stages   = {name: [calls, total_seconds]}
+    counters = {name: value}
+    events   = Chrome-trace "complete" events (only kept if trace=True)
+    """
+
+    def __init__(self, enabled=True, trace=False):
+        self.enabled = enabled
+        self.trace = enabled and trace
+        self.stages = {}
+        self.counters = {}
+        self.events = []
+        self._origin = time.perf_counter()
+
+    def stage(self, name):
+        """
+        Context manager timing one occurrence of a named stage.
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name, amount=1):
+        """
+        Add amount to a named counter.
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record(self, name, start, end):
+        entry = self.stages.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += end - start
+        if self.trace:
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    def merge(self, report):
+        """
+        Fold a report() dict (e.g. from a worker process) into this profiler.
+        """
+        if not self.enabled:
+            return
+        for name, stats in report.get("stages", {}).items():
+            entry = self.stages.setdefault(name, [0, 0.0])
+            entry[0] += stats["calls"]
+            entry[1] += stats["seconds"]
+        for name, value in report.get("counters", {}).items():
+            self.counters[name] = self.counters.get(name, 0) + value
+        if self.trace:
+            self.events.extend(report.get("events", []))
+
+    def report(self):
+        """
+        Return the aggregated stages and counters as a JSON-ready dict.
+        """
+        report = {
+            "wall_seconds": time.perf_counter() - self._origin,
+            "stages": {
+                name: {"calls": calls, "seconds": seconds}
+                for name, (calls, seconds) in sorted(self.stages.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+        }
+        if self.trace:
+            report["events"] = self.events
+        return report
+
+    def write_report(self, path):
+        report = self.report()
+        report.pop("events", None)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def write_trace(self, path):
+        """
+        Write the collected events in Chrome trace format (chrome://tracing,
+        Perfetto).
+        """
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events}, f)
+
+class _Stage:
+    __slots__ = ("prof", "name", "start")
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.prof.record(self.name, self.start, time.perf_counter())
+        return False
+
+# Default profiler used when callers don't pass one
+DISABLED = Profiler(enabled=False)
@@ -0,0 +1,321 @@
+import asyncio
+import io
+import json
+import os
+import random
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from PIL import Image
+
+import jigcut
+import profiling
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Only images under this directory can be requested
+IMAGE_ROOT = "."
+
+# Render threads (None = Python's default for ThreadPoolExecutor)
+WORKERS = None
+
+# Memory budgets for the caches
+IMAGE_CACHE_BYTES = 1024 * 1024 * 1024     # decoded RGBA source images
+RESULT_CACHE_BYTES = 256 * 1024 * 1024     # encoded piece PNGs
+PATTERN_CACHE_EDGES = 4_000_000            # (rows, cols, seed) edge patterns
+
+# Largest rows x cols grid a request may ask for. Patterns are built on the
+# event loop, so this bounds how long one request can hold it up.
+MAX_PIECES = 250_000
+
+###############################################################################
+# CACHING
+###############################################################################
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by total cost (bytes, entries, ...).
+    cost(value) gives the size charged for each entry.
+    """
+
+    def __init__(self, capacity, cost=lambda value: 1):
+        self.capacity = capacity
+        self.cost = cost
+        self.total = 0
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, value):
+        size = self.cost(value)
+        if size > self.capacity:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.total -= old[1]
+        self.entries[key] = (value, size)
+        self.total += size
+        while self.total > self.capacity:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total -= evicted
+
+def image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+def pattern_edges(patterns):
+    return sum(len(line) for pattern in patterns for line in pattern.values())
+
+###############################################################################
+# RENDERING (runs on worker threads)
+###############################################################################
+
+def load_image(path):
+    return Image.open(path).convert("RGBA")
+
+def render_piece_png(image, rows, cols, row, col, tpat, spat):
+    """
+    Cut one piece and return it encoded as PNG bytes.
+    """
+    pw = image.width // cols
+    ph = image.height // rows
+    piece = jigcut.create_piece(image, row, col, pw, ph, tpat, spat)
+    out = io.BytesIO()
+    piece.save(out, format="PNG")
+    return out.getvalue()
+
+###############################################################################
+# SERVER
+###############################################################################
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+REASONS = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found",
+    405: "Method Not Allowed", 500: "Internal Server Error",
+}
+
+class PieceServer:
+    """
+    Serve single pieces over HTTP:
+      GET /piece?image=<path>&rows=R&cols=C&seed=S&row=r&col=c  -> image/png
+      GET /stats                                                -> JSON
+    Decoded images, edge patterns and encoded pieces are cached, and
+    concurrent requests for the same thing share one computation.
+    """
+
+    def __init__(self, image_root=IMAGE_ROOT, workers=WORKERS):
+        self.image_root = os.path.realpath(image_root)
+        # Threads rather than processes: workers read the decoded images
+        # straight out of this process's cache, and PIL drops the GIL for
+        # the heavy crop/paste/encode work.
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.images = LRUCache(IMAGE_CACHE_BYTES, cost=image_bytes)
+        self.results = LRUCache(RESULT_CACHE_BYTES, cost=len)
+        self.patterns = LRUCache(PATTERN_CACHE_EDGES, cost=pattern_edges)
+        self.inflight = {}
+        self.prof = profiling.Profiler()
+
+    async def coalesce(self, key, factory, *args):
+        """
+        Run factory(*args) once per key, however many callers are waiting.
+        """
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory(*args))
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.prof.count("coalesced")
+        # Shield so one client hanging up doesn't cancel the shared work
+        return await asyncio.shield(task)
+
+    async def get_image(self, path, mtime):
+        key = (path, mtime)
+        image = self.images.get(key)
+        if image is not None:
+            self.prof.count("image_cache_hits")
+            return image
+        return await self.coalesce(("image",) + key, self._load_image, key)
+
+    async def _load_image(self, key):
+        self.prof.count("image_cache_misses")
+        loop = asyncio.get_running_loop()
+        with self.prof.stage("load"):
+            try:
+                image = await loop.run_in_executor(self.pool, load_image, key[0])
+            except OSError:
+                # PIL's UnidentifiedImageError included; name the file the way
+                # the client did, not by its path on this server
+                name = os.path.relpath(key[0], self.image_root)
+                raise HTTPError(400, f"not an image: {name}")
+        self.images.put(key, image)
+        return image
+
+    def get_patterns(self, rows, cols, seed):
+        key = (rows, cols, seed)
+        patterns = self.patterns.get(key)
+        if patterns is None:
+            patterns = jigcut.generate_patterns(rows, cols, random.Random(seed))
+            self.patterns.put(key, patterns)
+        else:
+            self.prof.count("pattern_cache_hits")
+        return patterns
+
+    async def get_piece(self, params):
+        path, mtime = self.resolve_image(params)
+        rows, cols, seed, row, col = (
+            int_param(params, name) for name in ("rows", "cols", "seed", "row", "col")
+        )
+        if rows < 1 or cols < 1 or not (0 <= row < rows and 0 <= col < cols):
+            raise HTTPError(400, "row/col outside the rows x cols grid")
+        if rows * cols > MAX_PIECES:
+            raise HTTPError(400, f"rows x cols above {MAX_PIECES} pieces")
+
+        key = (path, mtime, rows, cols, seed, row, col)
+        data = self.results.get(key)
+        if data is not None:
+            self.prof.count("result_cache_hits")
+            return data
+        return await self.coalesce(("piece",) + key, self._render, key)
+
+    async def _render(self, key):
+        path, mtime, rows, cols, seed, row, col = key
+        self.prof.count("result_cache_misses")
+        image = await self.get_image(path, mtime)
+        if rows > image.height or cols > image.width:
+            raise HTTPError(400, "more rows/cols than the image has pixels")
+        tpat, spat = self.get_patterns(rows, cols, seed)
+        loop = asyncio.get_running_loop()
+        with self.prof.stage("render"):
+            data = await loop.run_in_executor(
+                self.pool, render_piece_png, image, rows, cols, row, col, tpat, spat
+            )
+        self.prof.count("bytes_written", len(data))
+        self.results.put(key, data)
+        return data
+
+    def resolve_image(self, params):
+        name = str_param(params, "image")
+        path = os.path.realpath(os.path.join(self.image_root, name))
+        if os.path.commonpath([path, self.image_root]) != self.image_root:
+            raise HTTPError(403, "image outside IMAGE_ROOT")
+        try:
+            return path, os.stat(path).st_mtime_ns
+        except OSError:
+            raise HTTPError(404, f"no such image: {name}")
+
+    async def handle(self, method, target):
+        """
+        Return (status, content_type, body) for one request.
+        """
+        if method != "GET":
+            raise HTTPError(405, "only GET is supported")
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+        if url.path == "/piece":
+            with self.prof.stage("request"):
+                return 200, "image/png", await self.get_piece(params)
+        if url.path == "/stats":
+            report = self.prof.report()
+            report["cache_bytes"] = {
+                "images": self.images.total,
+                "results": self.results.total,
+            }
+            return 200, "application/json", json.dumps(report).encode()
+        raise HTTPError(404, f"unknown path: {url.path}")
+
+    async def serve_connection(self, reader, writer):
+        """
+        HTTP/1.1 with keep-alive; one request at a time per connection.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+                keep_alive = headers.get("connection") != "close"
+                if version == "HTTP/1.0":
+                    keep_alive = headers.get("connection") == "keep-alive"
+
+                try:
+                    status, content_type, body = await self.handle(method, target)
+                except HTTPError as e:
+                    status, content_type, body = e.status, "text/plain", str(e).encode()
+                except Exception:
+                    # Details go to the server log only, never to the client
+                    traceback.print_exc()
+                    status, content_type, body = 500, "text/plain", b"internal error"
+
+                head = (
+                    f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    "\r\n"
+                )
+                writer.write(head.encode("latin-1") + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+def str_param(params, name):
+    values = params.get(name)
+    if not values:
+        raise HTTPError(400, f"missing parameter: {name}")
+    return values[0]
+
+def int_param(params, name):
+    try:
+        return int(str_param(params, name))
+    except ValueError:
+        raise HTTPError(400, f"parameter {name} must be an integer")
+
+async def serve(host=HOST, port=PORT):
+    server = PieceServer()
+    listener = await asyncio.start_server(server.serve_connection, host, port)
+    print(f"Serving pieces from {server.image_root} on http://{host}:{port}/piece")
+    async with listener:
+        await listener.serve_forever()
+
+def main():
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+###############################################################################
+# EXECUTE
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import json
+from collections import namedtuple
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+# Positions along an edge where its profile is sampled
+SAMPLES = 16
+
+# Quantisation used for index keys: displacements in 1/PROFILE_STEPS of the
+# edge length, tab centres in 1/CENTER_STEPS of it
+PROFILE_STEPS = 64
+CENTER_STEPS = 100
+
+SIDES = ("top", "right", "bottom", "left")
+
+###############################################################################
+# EDGE DESCRIPTORS
+###############################################################################
+
+# type    = 0 flat, +1 outward, -1 inward, as seen from the piece
+# center  = tab centre as a fraction of the edge, walking the piece clockwise
+# profile = SAMPLES displacements from the straight edge (outward positive,
+#           as a fraction of the edge length), walking the piece clockwise
+EdgeDescriptor = namedtuple("EdgeDescriptor", ["type", "center", "profile"])
+
+def edge_profile(polyline, samples=SAMPLES):
+    """
+    Sample an edge polyline, given clockwise around its piece from corner to
+    corner. At each of `samples` evenly spaced positions along the edge this
+    takes the displacement furthest from the straight edge, so overhanging
+    tabs are described by their outline rather than by point order.
+    """
+    (x0, y0), (x1, y1) = polyline[0], polyline[-1]
+    length_sq = (x1 - x0) ** 2 + (y1 - y0) ** 2
+    # (along, across) in edge lengths; outward is the left-hand normal
+    # of a clockwise walk in image (y down) coordinates
+    local = [
+        (((x - x0) * (x1 - x0) + (y - y0) * (y1 - y0)) / length_sq,
+         ((x - x0) * (y1 - y0) - (y - y0) * (x1 - x0)) / length_sq)
+        for x, y in polyline
+    ]
+
+    profile = []
+    for i in range(samples):
+        u = (i + 0.5) / samples
+        best = 0.0
+        for (a0, d0), (a1, d1) in zip(local, local[1:]):
+            if a0 == a1 or not (min(a0, a1) <= u <= max(a0, a1)):
+                continue
+            d = d0 + (d1 - d0) * (u - a0) / (a1 - a0)
+            if abs(d) > abs(best):
+                best = d
+        profile.append(best)
+    return tuple(profile)
+
+def mate_descriptor(d):
+    """
+    The descriptor the neighbouring piece sees for the same edge: opposite
+    type, walked the other way, displaced the other way.
+    """
+    return EdgeDescriptor(-d.type, 1 - d.center, tuple(-v for v in reversed(d.profile)))
+
+def signature(d):
+    """
+    Hashable, quantised key for a descriptor.
+    """
+    return (
+        d.type,
+        round(d.center * CENTER_STEPS),
+        tuple(round(v * PROFILE_STEPS) for v in d.profile),
+    )
+
+def mate_signature(d):
+    """
+    Key of the edge that fits d. Derived from d's own key rather than
+    re-quantising mate_descriptor(d), so rounding can't break the match.
+    """
+    edge_type, center, profile = signature(d)
+    return (-edge_type, CENTER_STEPS - center, tuple(-v for v in reversed(profile)))
+
+###############################################################################
+# INDEX
+###############################################################################
+
+class EdgeIndex:
+    """
+    Hash of edge signatures to the (piece, side) pairs that have them, so
+    "which piece mates with this edge" is a single dict lookup.
+    """
+
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, piece, side, descriptor):
+        if descriptor.type != 0:
+            self.buckets.setdefault(signature(descriptor), []).append((piece, side))
+
+    def mates(self, descriptor):
+        """
+        Return the (piece, side) pairs whose edge fits descriptor.
+        """
+        if descriptor.type == 0:
+            return []
+        return self.buckets.get(mate_signature(descriptor), [])
+
+    @classmethod
+    def from_pieces(cls, pieces):
+        """
+        Build an index from {piece: (top, right, bottom, left) descriptors}.
+        """
+        index = cls()
+        for piece, descriptors in pieces.items():
+            for side, descriptor in zip(SIDES, descriptors):
+                index.add(piece, side, descriptor)
+        return index
+
+def write_descriptors(path, pieces):
+    """
+    Save {(row, col): (top, right, bottom, left)} descriptors as JSON.
+    """
+    out = [
+        {
+            "row": row,
+            "col": col,
+            "edges": {side: d._asdict() for side, d in zip(SIDES, descriptors)},
+        }
+        for (row, col), descriptors in sorted(pieces.items())
+    ]
+    with open(path, "w") as f:
+        json.dump(out, f)
+
+def read_descriptors(path):
+    """
+    Load descriptors written by write_descriptors.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    return {
+        (entry["row"], entry["col"]): tuple(
+            EdgeDescriptor(e["type"], e["center"], tuple(e["profile"]))
+            for e in (entry["edges"][side] for side in SIDES)
+        )
+        for entry in data
+    }
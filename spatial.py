@@ -0,0 +1,53 @@
+import math
+
+###############################################################################
+# UNIFORM-GRID SPATIAL HASH
+###############################################################################
+
+def boxes_overlap(a, b):
+    """
+    True if two (x0, y0, x1, y1) boxes intersect (touching counts).
+    """
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def points_box(points, pad=0):
+    """
+    Bounding box (x0, y0, x1, y1) of a list of (x, y), grown by pad.
+    """
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs) - pad, min(ys) - pad, max(xs) + pad, max(ys) + pad)
+
+class SpatialHash:
+    """
+    Bucket axis-aligned boxes into square cells of cell_size, so overlap
+    queries only look at boxes stored near the query box. With boxes about
+    the size of a cell, insert and query are O(1) on average.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.buckets = {}
+
+    def _cells(self, box):
+        size = self.cell_size
+        for i in range(math.floor(box[0] / size), math.floor(box[2] / size) + 1):
+            for j in range(math.floor(box[1] / size), math.floor(box[3] / size) + 1):
+                yield i, j
+
+    def insert(self, box, item):
+        entry = (box, item)
+        for cell in self._cells(box):
+            self.buckets.setdefault(cell, []).append(entry)
+
+    def query(self, box):
+        """
+        Yield the item of every stored box that overlaps box (once per insert).
+        """
+        seen = set()
+        for cell in self._cells(box):
+            for entry in self.buckets.get(cell, ()):
+                if id(entry) in seen or not boxes_overlap(box, entry[0]):
+                    continue
+                seen.add(id(entry))
+                yield entry[1]
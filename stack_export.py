@@ -0,0 +1,74 @@
+import numpy as np
+from numpy.lib.format import open_memmap
+
+import profiling
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+STACK_NAME = "pieces.npy"
+INDEX_NAME = "pieces_index.npy"
+
+# One record per piece in INDEX_NAME. offset is the byte offset of the
+# piece's tile inside STACK_NAME; height/width is the used part of the tile
+# (the rest is transparent padding); edge types are 0=flat, +1=outward,
+# -1=inward, as seen from the piece.
+INDEX_DTYPE = np.dtype([
+    ("row", np.int32),
+    ("col", np.int32),
+    ("offset", np.uint64),
+    ("height", np.int32),
+    ("width", np.int32),
+    ("top", np.int8),
+    ("right", np.int8),
+    ("bottom", np.int8),
+    ("left", np.int8),
+])
+
+###############################################################################
+# PIECE STACK
+###############################################################################
+
+class PieceStack:
+    """
+    Write pieces straight into one (count, tile_height, tile_width, 4) uint8
+    .npy file, each padded to the tile size. Consumers can
+
+        stack = np.load("pieces.npy", mmap_mode="r")
+        index = np.load("pieces_index.npy")
+        batch = stack[i:i + 64]
+
+    and slice batches without decoding or copying anything.
+    """
+
+    def __init__(self, path, count, tile_height, tile_width):
+        # A fresh .npy file is all zeros, so padding is already transparent
+        self.array = open_memmap(
+            path, mode="w+", dtype=np.uint8, shape=(count, tile_height, tile_width, 4)
+        )
+        self.index = np.zeros(count, dtype=INDEX_DTYPE)
+        self.tile_bytes = tile_height * tile_width * 4
+        self.count = 0
+
+    def add(self, piece, row, col, edges, prof=profiling.DISABLED):
+        """
+        Store an RGBA piece image in the next tile.
+        edges = (top, right, bottom, left) edge types of the piece
+        """
+        i = self.count
+        with prof.stage("stack"):
+            pixels = np.asarray(piece)
+            height = min(pixels.shape[0], self.array.shape[1])
+            width = min(pixels.shape[1], self.array.shape[2])
+            self.array[i, :height, :width] = pixels[:height, :width]
+        offset = self.array.offset + i * self.tile_bytes
+        self.index[i] = (row, col, offset, height, width) + tuple(edges)
+        self.count += 1
+        prof.count("pieces")
+        prof.count("bytes_written", self.tile_bytes)
+
+    def close(self, index_path):
+        self.array.flush()
+        np.save(index_path, self.index[:self.count])
+        del self.array
@@ -0,0 +1,222 @@
+from collections import namedtuple
+
+from spatial import SpatialHash, boxes_overlap, points_box
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+# How far a tab may wander from the plain centred shape
+POSITION_JITTER = 0.1   # shift of the tab centre, as a fraction of the edge
+SIZE_JITTER = 0.15      # relative change in tab size
+SKEW_JITTER = 0.3       # lean of the tab away from square to its edge
+
+# Attempts per edge before falling back to a centred tab
+MAX_TRIES = 10
+
+# Points per bounding box when covering a tab outline with boxes
+CHUNK = 4
+
+###############################################################################
+# TAB JITTER
+###############################################################################
+
+# offset = tab centre shift along the edge (fraction of the edge length)
+# scale  = multiplier on the tab size
+# skew   = lean of the tab, see lean()
+TabJitter = namedtuple("TabJitter", ["offset", "scale", "skew"])
+
+CENTERED = TabJitter(0.0, 1.0, 0.0)
+
+def random_jitter(rng, position=POSITION_JITTER, size=SIZE_JITTER, skew=SKEW_JITTER):
+    return TabJitter(
+        rng.uniform(-position, position),
+        1 + rng.uniform(-size, size),
+        rng.uniform(-skew, skew),
+    )
+
+def lean(points, horizontal, base, skew):
+    """
+    Shear the points of a tab drawn on the edge line at base (a y for
+    horizontal edges, an x for vertical ones): every point moves along the
+    edge by skew * (its signed distance from the edge line) / 2. The shear
+    only depends on absolute coordinates, so both pieces sharing an edge
+    lean their tab the same way.
+    """
+    if not skew:
+        return points
+    if horizontal:
+        return [(x + skew * (base - y) / 2, y) for x, y in points]
+    return [(x, y + skew * (x - base) / 2) for x, y in points]
+
+def tab_boxes(polyline, clearance):
+    """
+    Cover the tab part of an edge polyline (everything standing off the
+    straight corner-to-corner baseline by more than clearance, including
+    the segments climbing to it) with small boxes grown by clearance / 2.
+    Returns None if the tab gets within clearance of either end of the
+    edge, where it would run into the neighbouring edges.
+    """
+    (x0, y0), (x1, y1) = polyline[0], polyline[-1]
+    length = ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+    ux, uy = (x1 - x0) / length, (y1 - y0) / length
+
+    boxes = []
+    run = []
+    previous = None
+    for x, y in polyline:
+        along = (x - x0) * ux + (y - y0) * uy
+        across = (y - y0) * ux - (x - x0) * uy
+        if abs(across) <= clearance:
+            if run:
+                # Cover the segment back down to the baseline too
+                run.append(_band_exit(previous, (x, y, across), clearance))
+                boxes.extend(_run_boxes(run, clearance))
+                run = []
+            previous = (x, y, across)
+            continue
+        if along < clearance or along > length - clearance:
+            return None
+        if not run and previous is not None:
+            # ...and the segment coming up from it
+            run.append(_band_exit((x, y, across), previous, clearance))
+        run.append((x, y))
+        previous = (x, y, across)
+    boxes.extend(_run_boxes(run, clearance))
+    return boxes
+
+def _band_exit(outside, inside, clearance):
+    # Point where the segment from outside to inside, both (x, y, across),
+    # enters the band within clearance of the baseline
+    ax, ay, a = outside
+    bx, by, b = inside
+    limit = clearance if a > 0 else -clearance
+    t = (a - limit) / (a - b)
+    return (ax + (bx - ax) * t, ay + (by - ay) * t)
+
+def _run_boxes(run, clearance):
+    # Long segments (a straight run up to an arc, say) are split so no box
+    # is much bigger than the outline it covers
+    points = run[:1]
+    for (ax, ay), (bx, by) in zip(run, run[1:]):
+        length = ((bx - ax) ** 2 + (by - ay) ** 2) ** 0.5
+        steps = int(length / (4 * clearance)) + 1
+        points += [
+            (ax + (bx - ax) * k / steps, ay + (by - ay) * k / steps)
+            for k in range(1, steps + 1)
+        ]
+    # Consecutive chunks share their end point so the whole run is covered
+    return [
+        points_box(points[i:i + CHUNK], clearance / 2)
+        for i in range(0, max(len(points) - 1, 1), CHUNK - 1)
+    ] if points else []
+
+def tab_shape(polylines, clearance):
+    """
+    (box, chunk_boxes) covering all the tab polylines, or None if a tab
+    reaches the ends of its edge. A shape with nothing off the baseline
+    is (None, []).
+    """
+    chunks = []
+    for polyline in polylines:
+        part = tab_boxes(polyline, clearance)
+        if part is None:
+            return None
+        chunks.extend(part)
+    if not chunks:
+        return None, []
+    box = (
+        min(c[0] for c in chunks), min(c[1] for c in chunks),
+        max(c[2] for c in chunks), max(c[3] for c in chunks),
+    )
+    return box, chunks
+
+def shapes_collide(a, b):
+    """
+    True if two (box, chunk_boxes) tab shapes overlap anywhere.
+    """
+    (a_box, a_chunks), (b_box, b_chunks) = a, b
+    if a_box is None or b_box is None or not boxes_overlap(a_box, b_box):
+        return False
+    mine = [c for c in a_chunks if boxes_overlap(c, b_box)]
+    theirs = [c for c in b_chunks if boxes_overlap(c, a_box)]
+    return any(boxes_overlap(m, t) for m in mine for t in theirs)
+
+def jitter_tabs(rows, cols, outlines, rng, clearance, cell_size,
+                position=POSITION_JITTER, size=SIZE_JITTER, skew=SKEW_JITTER,
+                max_tries=MAX_TRIES):
+    """
+    Pick a TabJitter for every interior edge of a rows x cols grid so that no
+    tab comes within clearance of a tab on another edge.
+
+    outlines(horizontal, r, c, jitter) must return the polylines the tab on
+    that edge can take (its actual direction, or one per direction if that
+    isn't known yet), each running from one corner of the edge to the other,
+    in image coordinates.
+
+    Returns (tab_jitter, side_jitter), laid out like the patterns of
+    jigcut.generate_patterns: tab_jitter[r][c] for the top edge of piece
+    (r, c), side_jitter[r][c] for its left edge. Border edges are CENTERED.
+
+    Each tab is found through a spatial hash of whole-tab boxes, then checked
+    box by box along its outline. Candidates must clear the tabs already
+    placed and the centred shape of edges not placed yet, so the centred
+    fallback after max_tries still fits every neighbour. That holds even
+    where two centred shapes come close to each other: a candidate that only
+    cleared such a neighbour's jittered shape could cross it once that
+    neighbour falls back to centred. Work per edge is constant, so the whole
+    grid is linear in the number of pieces.
+    """
+    tab_jitter = {r: {c: CENTERED for c in range(cols)} for r in range(rows + 1)}
+    side_jitter = {r: {c: CENTERED for c in range(cols + 1)} for r in range(rows)}
+
+    edges = []
+    for r in range(rows):
+        for c in range(cols):
+            if r > 0:
+                edges.append((True, r, c))
+            if c > 0:
+                edges.append((False, r, c))
+
+    # Centred shape of every edge, until that edge gets its final jitter
+    centred = {}
+    pending = SpatialHash(cell_size)
+    for edge in edges:
+        centred[edge] = tab_shape(outlines(*edge, CENTERED), clearance) or (None, [])
+        if centred[edge][0] is not None:
+            pending.insert(centred[edge][0], edge)
+
+    placed = SpatialHash(cell_size)
+    shapes = {}
+
+    def conflicts(edge, shape):
+        for other in placed.query(shape[0]):
+            if shapes_collide(shape, shapes[other]):
+                return True
+        for other in pending.query(shape[0]):
+            if other == edge or other in shapes:
+                continue
+            if shapes_collide(shape, centred[other]):
+                return True
+        return False
+
+    for edge in edges:
+        horizontal, r, c = edge
+        for _ in range(max_tries):
+            jitter = random_jitter(rng, position, size, skew)
+            shape = tab_shape(outlines(horizontal, r, c, jitter), clearance)
+            if shape is not None and (shape[0] is None or not conflicts(edge, shape)):
+                break
+        else:
+            jitter = CENTERED
+            shape = centred[edge]
+
+        shapes[edge] = shape
+        if shape[0] is not None:
+            placed.insert(shape[0], edge)
+        if horizontal:
+            tab_jitter[r][c] = jitter
+        else:
+            side_jitter[r][c] = jitter
+
+    return tab_jitter, side_jitter
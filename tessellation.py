@@ -0,0 +1,331 @@
+import json
+import math
+import os
+import random
+from PIL import Image, ImageDraw
+
+import jigcut
+import profiling
+import tabs
+from bezier_divider import horizontal_edge_segments, flatten_segments
+from spatial import SpatialHash, boxes_overlap, points_box
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+IMAGE_PATH = "diagonal_pebble_gradient.png"  # Update to your image file
+OUTPUT_DIR = "tessellation_pieces"
+
+# "hex" = hexagonal cells, "voronoi" = irregular cells around jittered seeds
+LAYOUT = "voronoi"
+CELL_SIZE = 200        # Approximate piece size in pixels
+VORONOI_JITTER = 0.45  # How far Voronoi seeds stray from a regular grid (fraction of CELL_SIZE)
+SEED = 42
+
+# Tab shape, as fractions of the shared edge (capped at CELL_SIZE)
+TAB_HEIGHT = 0.25
+TAB_WIDTH = 0.6
+
+# Edges shorter than this fraction of CELL_SIZE stay flat
+MIN_TAB_EDGE = 0.35
+
+# Optional profiling output, as in jigcut.py
+PROFILE_REPORT = None
+
+###############################################################################
+# CELLS
+###############################################################################
+
+def hex_seeds(width, height, size):
+    """
+    Centres of a pointy-top hexagonal lattice with spacing size; their
+    Voronoi cells are the hexagons.
+    """
+    row_height = size * math.sqrt(3) / 2
+    seeds = []
+    for j in range(int(height / row_height) + 1):
+        y = row_height / 2 + j * row_height
+        shift = size / 2 if j % 2 else 0
+        for i in range(int(width / size) + 1):
+            x = size / 2 + i * size - shift
+            if 0 <= x < width and 0 <= y < height:
+                seeds.append((x, y))
+    return seeds
+
+def voronoi_seeds(width, height, size, jitter, rng):
+    """
+    One seed per size x size grid square, moved randomly by up to
+    jitter * size, so cells are irregular but evenly spread.
+    """
+    seeds = []
+    for j in range(math.ceil(height / size)):
+        for i in range(math.ceil(width / size)):
+            x = (i + 0.5 + rng.uniform(-jitter, jitter)) * size
+            y = (j + 0.5 + rng.uniform(-jitter, jitter)) * size
+            seeds.append((min(max(x, 0), width - 1), min(max(y, 0), height - 1)))
+    return seeds
+
+def clip_cell(polygon, s, t, label):
+    """
+    Clip a labelled polygon [(vertex, label of the edge leaving it), ...]
+    to the half-plane closer to seed s than to seed t. The new edge along
+    the bisector is labelled with t's label.
+    """
+    mx, my = (s[0] + t[0]) / 2, (s[1] + t[1]) / 2
+    nx, ny = t[0] - s[0], t[1] - s[1]
+
+    def side(p):
+        return (p[0] - mx) * nx + (p[1] - my) * ny
+
+    out = []
+    for k, (v, edge_label) in enumerate(polygon):
+        w = polygon[(k + 1) % len(polygon)][0]
+        sv, sw = side(v), side(w)
+        if sv <= 0:
+            out.append((v, edge_label))
+        if (sv <= 0) != (sw <= 0):
+            f = sv / (sv - sw)
+            p = (v[0] + (w[0] - v[0]) * f, v[1] + (w[1] - v[1]) * f)
+            # Leaving: the bisector edge starts here. Entering: the rest of
+            # the original edge starts here.
+            out.append((p, label if sv <= 0 else edge_label))
+    return out
+
+def build_cells(seeds, width, height, size):
+    """
+    Voronoi cell of every seed, clipped to the image, as a clockwise list of
+    (vertex, label) where label is the neighbouring seed index across the
+    edge leaving that vertex, or None on the image border.
+
+    Nearby seeds come from a spatial hash, tried nearest first; a seed
+    further than twice the cell's current radius can't cut it, so each cell
+    only looks at its few neighbours and the whole build is O(n log n).
+    """
+    index = SpatialHash(size)
+    for i, (x, y) in enumerate(seeds):
+        index.insert((x, y, x, y), i)
+
+    border = [((0, 0), None), ((width, 0), None), ((width, height), None), ((0, height), None)]
+    cells = []
+    for i, s in enumerate(seeds):
+        reach = 2 * size
+        while True:
+            box = (s[0] - reach, s[1] - reach, s[0] + reach, s[1] + reach)
+            near = sorted(
+                (math.dist(s, seeds[j]), j) for j in index.query(box) if j != i
+            )
+            polygon = border
+            for dist, j in near:
+                radius = max(math.dist(s, v) for v, _ in polygon)
+                if dist > 2 * radius:
+                    break
+                polygon = clip_cell(polygon, s, seeds[j], j)
+            radius = max(math.dist(s, v) for v, _ in polygon)
+            if 2 * radius <= reach:
+                break
+            reach = 2 * radius
+
+        # Drop the zero-length edges left where three cells meet
+        cells.append([
+            (v, label) for k, (v, label) in enumerate(polygon)
+            if math.dist(v, polygon[(k + 1) % len(polygon)][0]) > 1e-6
+        ])
+    return cells
+
+###############################################################################
+# SHARED EDGES AND TABS
+###############################################################################
+
+def cell_edges(cell):
+    """
+    Yield (start, end, label) for each edge of a labelled cell polygon.
+    """
+    for k, (v, label) in enumerate(cell):
+        yield v, cell[(k + 1) % len(cell)][0], label
+
+def edge_segments(p, q, direction, tab_height, tab_width):
+    """
+    Bézier segments of a jigsaw edge from p to q: the horizontal edge shape
+    from bezier_divider.py, rotated and moved onto p -> q.
+    """
+    length = math.dist(p, q)
+    cos_a, sin_a = (q[0] - p[0]) / length, (q[1] - p[1]) / length
+    local = horizontal_edge_segments(0, length, 0, direction, tab_height, tab_width)
+    return [
+        tuple((p[0] + x * cos_a - y * sin_a, p[1] + x * sin_a + y * cos_a) for x, y in seg)
+        for seg in local
+    ]
+
+def _crosses(a, b, c, d):
+    # Strict crossing only: segments meeting at a shared corner don't count
+    def orient(p, q, r):
+        return (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+    return (
+        orient(a, b, c) * orient(a, b, d) < 0
+        and orient(c, d, a) * orient(c, d, b) < 0
+    )
+
+def stays_inside(points, box, cells, i, j):
+    """
+    True if the polyline of the edge between cells i and j crosses none of
+    the other edges of those two cells, i.e. its tab doesn't cut into a
+    third cell at a sharp corner or leave the image. Only the parts of both
+    reaching into the tab's box are tested, so the corners the edge shares
+    with its neighbours (equal only up to rounding) never count.
+    """
+    walls = [
+        (p, q) for k in (i, j) for p, q, label in cell_edges(cells[k])
+        if label not in (i, j) and boxes_overlap(points_box((p, q)), box)
+    ]
+    if not walls:
+        return True
+    return not any(
+        _crosses(a, b, p, q)
+        for a, b in zip(points, points[1:])
+        if boxes_overlap(points_box((a, b)), box)
+        for p, q in walls
+    )
+
+def place_tabs(cells, size, rng):
+    """
+    Give every shared edge, once, a tab whose shape is stored from the lower
+    numbered cell's point of view. A tab that would run into a tab already
+    placed (checked through a spatial hash, see tabs.py) or out of its two
+    cells is flipped, then shrunk, then left flat.
+    Returns {(i, j): flattened points from cell i's start to end}, i < j.
+    """
+    clearance = size * 0.02
+    placed = SpatialHash(size / 2)
+    shapes = {}
+    edges = {}
+
+    for i, cell in enumerate(cells):
+        for p, q, j in cell_edges(cell):
+            if j is None or j < i:
+                continue
+            length = math.dist(p, q)
+            if length < MIN_TAB_EDGE * size:
+                continue
+            tab_size = min(length, size)
+            direction = rng.choice([1, -1])
+            candidates = [
+                (direction, 1.0), (-direction, 1.0),
+                (direction, 0.7), (-direction, 0.7),
+            ]
+            for d, scale in candidates:
+                segments = edge_segments(
+                    p, q, d, tab_size * TAB_HEIGHT * scale, tab_size * TAB_WIDTH * scale
+                )
+                outline = flatten_segments(segments, steps=8)
+                shape = tabs.tab_shape([outline], clearance)
+                if shape is None:
+                    continue
+                if shape[0] is None:
+                    break
+                if not any(
+                    tabs.shapes_collide(shape, shapes[other]) for other in placed.query(shape[0])
+                ) and stays_inside(outline, shape[0], cells, i, j):
+                    break
+            else:
+                continue
+
+            edges[i, j] = flatten_segments(segments)
+            shapes[i, j] = shape
+            if shape[0] is not None:
+                placed.insert(shape[0], (i, j))
+    return edges
+
+def cell_path(i, cell, edges):
+    """
+    Outline of cell i: straight edges, with each tabbed shared edge replaced
+    by its curve (reversed when stored from the neighbour's side).
+    """
+    path = []
+    for p, q, j in cell_edges(cell):
+        if j is not None and (i, j) in edges:
+            path.extend(edges[i, j][:-1])
+        elif j is not None and (j, i) in edges:
+            path.extend(edges[j, i][:0:-1])
+        else:
+            path.append(p)
+    return path
+
+###############################################################################
+# PIECES
+###############################################################################
+
+def cut_cell(image, path, prof=profiling.DISABLED):
+    """
+    Cut the piece with outline path out of image, on a canvas just covering
+    the outline's bounding box. Returns (piece, (x, y) of the canvas).
+    """
+    x0 = max(0, math.floor(min(p[0] for p in path)))
+    y0 = max(0, math.floor(min(p[1] for p in path)))
+    x1 = min(image.width, math.ceil(max(p[0] for p in path)))
+    y1 = min(image.height, math.ceil(max(p[1] for p in path)))
+
+    with prof.stage("canvas"):
+        mask = Image.new("L", (x1 - x0, y1 - y0), 0)
+        draw = ImageDraw.Draw(mask)
+    prof.count("vertices", len(path))
+    with prof.stage("rasterize"):
+        draw.polygon([(x - x0, y - y0) for x, y in path], fill=255)
+    with prof.stage("crop"):
+        piece = image.crop((x0, y0, x1, y1))
+    with prof.stage("putalpha"):
+        piece.putalpha(mask)
+    return piece, (x0, y0)
+
+def main():
+    prof = profiling.Profiler(enabled=bool(PROFILE_REPORT))
+
+    # Load image
+    with prof.stage("load"):
+        image = Image.open(IMAGE_PATH).convert("RGBA")
+    width, height = image.size
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Lay out the cells and their shared edges
+    rng = random.Random(SEED)
+    with prof.stage("layout"):
+        if LAYOUT == "hex":
+            seeds = hex_seeds(width, height, CELL_SIZE)
+        else:
+            seeds = voronoi_seeds(width, height, CELL_SIZE, VORONOI_JITTER, rng)
+        cells = build_cells(seeds, width, height, CELL_SIZE)
+        edges = place_tabs(cells, CELL_SIZE, rng)
+    print(f"{len(cells)} cells, {len(edges)} tabbed edges")
+
+    # Cut every piece through its own bounding box
+    index = []
+    for i, cell in enumerate(cells):
+        if len(cell) < 3:
+            continue
+        with prof.stage("path"):
+            path = cell_path(i, cell, edges)
+        piece, (x, y) = cut_cell(image, path, prof)
+        jigcut.save_piece(piece, os.path.join(OUTPUT_DIR, f"piece_{i}.png"), prof)
+        index.append({
+            "id": i,
+            "x": x,
+            "y": y,
+            "neighbors": sorted({j for _, _, j in cell_edges(cell) if j is not None}),
+        })
+
+    # Where each piece sits in the source and which pieces it touches
+    with open(os.path.join(OUTPUT_DIR, "pieces.json"), "w") as f:
+        json.dump(index, f)
+    print(f"All pieces saved to {OUTPUT_DIR}")
+
+    if PROFILE_REPORT:
+        prof.write_report(PROFILE_REPORT)
+        print(f"Profile report saved to {PROFILE_REPORT}")
+
+###############################################################################
+# EXECUTE
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import math
+import os
+import random
+from PIL import Image, ImageDraw
+
+from bezier_divider import iter_cut_edges, jitter_layout, flatten_segments
+from grid_divider import iter_grid_lines
+from spatial import SpatialHash
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+# Update to your image file. The source is decoded whole (PIL can't decode
+# PNG/JPEG by region), so memory grows with its size: the peak is about
+# 1.25x its decoded size (3 bytes/pixel for RGB, 4 with alpha), e.g. about
+# 3.75 GB for a 1-gigapixel RGB photo, while the first level is halved.
+IMAGE_PATH = "diagonal_pebble_gradient.png"
+OUTPUT_NAME = "jigsaw_overlay"  # writes jigsaw_overlay.dzi + jigsaw_overlay_files/
+ROWS = 5
+COLS = 5
+
+# "jigsaw" = bezier_divider.py cut curves, "grid" = grid_divider.py lines
+STYLE = "jigsaw"
+SEED = 42          # Same seeds as bezier_divider.py / vector_export.py
+JITTER = False
+JITTER_SEED = 43
+
+# Deep Zoom tiling
+TILE_SIZE = 256
+TILE_OVERLAP = 1
+TILE_FORMAT = "jpg"  # "jpg" or "png"
+JPEG_QUALITY = 90
+
+LINE_COLOR = (0, 0, 0)
+LINE_WIDTH = 2  # Screen pixels at every zoom level
+
+###############################################################################
+# EDGE INDEX
+###############################################################################
+
+def edge_box(kind, geometry):
+    """
+    Bounding box of a cut edge. For curves the control points are used:
+    a Bézier segment never leaves the box of its control points.
+    """
+    if kind == "line":
+        points = geometry
+    else:
+        points = [p for segment in geometry for p in segment]
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def build_edge_index(edges, cell_size):
+    """
+    Put every ("line" | "curve", geometry) edge into a SpatialHash keyed by
+    its box in full-resolution pixels.
+    """
+    index = SpatialHash(cell_size)
+    for kind, geometry in edges:
+        box = edge_box(kind, geometry)
+        index.insert(box, (kind, geometry, box))
+    return index
+
+def draw_edge(draw, kind, geometry, box, scale, dx, dy):
+    """
+    Draw one edge onto a tile: scale full-resolution coordinates to the
+    level, then shift to the tile origin.
+    """
+    if kind == "line":
+        points = geometry
+    else:
+        # No more curve points than the edge has on-screen pixels to show them
+        size = max(box[2] - box[0], box[3] - box[1]) * scale
+        points = flatten_segments(geometry, steps=max(2, min(20, int(size / 4))))
+    draw.line(
+        [(x * scale - dx, y * scale - dy) for x, y in points],
+        fill=LINE_COLOR, width=LINE_WIDTH,
+    )
+
+###############################################################################
+# PYRAMID
+###############################################################################
+
+def write_pyramid(image, index, output_name):
+    """
+    Write a Deep Zoom pyramid of image with the indexed edges drawn on.
+    Level max_level is full resolution; each level below is half the size.
+    Every tile is drawn with just the edges whose boxes reach into it.
+    Returns the number of tiles written.
+    """
+    width, height = image.size
+    max_level = math.ceil(math.log2(max(width, height)))
+    tiles_dir = f"{output_name}_files"
+    ext = TILE_FORMAT
+    tile_count = 0
+
+    level_image = image
+    for level in range(max_level, -1, -1):
+        if level < max_level:
+            # Downsample from the level above, never from the full image
+            level_image = level_image.resize(
+                (math.ceil(level_image.width / 2), math.ceil(level_image.height / 2)),
+                Image.BOX,
+            )
+        scale = 2.0 ** (level - max_level)
+        level_dir = os.path.join(tiles_dir, str(level))
+        os.makedirs(level_dir, exist_ok=True)
+
+        # Reach of the drawn lines, in full-resolution pixels
+        pad = LINE_WIDTH / scale
+
+        for ty in range(math.ceil(level_image.height / TILE_SIZE)):
+            for tx in range(math.ceil(level_image.width / TILE_SIZE)):
+                x0 = max(0, tx * TILE_SIZE - TILE_OVERLAP)
+                y0 = max(0, ty * TILE_SIZE - TILE_OVERLAP)
+                x1 = min(level_image.width, (tx + 1) * TILE_SIZE + TILE_OVERLAP)
+                y1 = min(level_image.height, (ty + 1) * TILE_SIZE + TILE_OVERLAP)
+
+                tile = level_image.crop((x0, y0, x1, y1))
+                draw = ImageDraw.Draw(tile)
+                query = (x0 / scale - pad, y0 / scale - pad, x1 / scale + pad, y1 / scale + pad)
+                for kind, geometry, box in index.query(query):
+                    draw_edge(draw, kind, geometry, box, scale, x0, y0)
+
+                path = os.path.join(level_dir, f"{tx}_{ty}.{ext}")
+                if ext == "jpg":
+                    tile.convert("RGB").save(path, quality=JPEG_QUALITY)
+                else:
+                    tile.save(path)
+                tile_count += 1
+
+    with open(f"{output_name}.dzi", "w") as f:
+        f.write(
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="{ext}" Overlap="{TILE_OVERLAP}" TileSize="{TILE_SIZE}">\n'
+            f'  <Size Width="{width}" Height="{height}"/>\n'
+            '</Image>\n'
+        )
+    return tile_count
+
+def main():
+    # Gigapixel sources are the point here, so lift PIL's size limit
+    Image.MAX_IMAGE_PIXELS = None
+
+    # Load the image, keeping RGB sources RGB: converting to RGBA would need
+    # a second full-size copy and a third more memory
+    try:
+        image = Image.open(IMAGE_PATH)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        width, height = image.size
+        print(f"Image loaded: {width}x{height} pixels")
+    except Exception as e:
+        print(f"Error loading image: {e}")
+        return
+
+    if STYLE == "grid":
+        edges = iter_grid_lines(width, height, ROWS, COLS)
+    else:
+        jitter = None
+        if JITTER:
+            jitter = jitter_layout(width, height, ROWS, COLS, random.Random(JITTER_SEED))
+        edges = iter_cut_edges(width, height, ROWS, COLS, random.Random(SEED), jitter)
+
+    index = build_edge_index(edges, max(TILE_SIZE, min(width // COLS, height // ROWS)))
+    count = write_pyramid(image, index, OUTPUT_NAME)
+    print(f"{count} tiles saved to {OUTPUT_NAME}.dzi")
+
+###############################################################################
+# EXECUTE
+###############################################################################
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import random
+from PIL import Image
+
+from bezier_divider import iter_cut_edges, jitter_layout
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+IMAGE_PATH = "diagonal_pebble_gradient.png"  # Only its size is read
+SVG_PATH = "jigsaw_cuts.svg"    # None to skip
+DXF_PATH = "jigsaw_cuts.dxf"    # None to skip
+ROWS = 5
+COLS = 5
+SEED = 42  # Same seed as bezier_divider.py, so the preview matches the cut
+
+# Randomised tabs (see tabs.py). The jitter table takes memory proportional
+# to the number of edges; without it the export runs in constant memory.
+JITTER = False
+JITTER_SEED = 43
+
+# Output units: every image pixel becomes SCALE units of UNIT
+UNIT = "mm"
+SCALE = 0.1
+
+# DXF $INSUNITS codes for the units we know about (0 = unitless)
+DXF_UNITS = {"in": 1, "ft": 2, "mm": 4, "cm": 5, "m": 6}
+
+###############################################################################
+# WRITERS
+###############################################################################
+
+class SvgWriter:
+    """
+    Write cut edges as SVG paths with native cubic Bézier ("C") commands.
+    """
+
+    def __init__(self, f, width, height, scale=SCALE, unit=UNIT):
+        self.f = f
+        self.scale = scale
+        w, h = width * scale, height * scale
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write(
+            f'<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{w:.3f}{unit}" height="{h:.3f}{unit}" viewBox="0 0 {w:.3f} {h:.3f}">\n'
+        )
+        f.write('<g fill="none" stroke="red" stroke-width="0.1">\n')
+
+    def point(self, p):
+        return f"{p[0] * self.scale:.3f} {p[1] * self.scale:.3f}"
+
+    def line(self, p0, p1):
+        self.f.write(f'<path d="M {self.point(p0)} L {self.point(p1)}"/>\n')
+
+    def curve(self, segments):
+        d = [f"M {self.point(segments[0][0])}"]
+        for _, c1, c2, end in segments:
+            d.append(f"C {self.point(c1)} {self.point(c2)} {self.point(end)}")
+        self.f.write(f'<path d="{" ".join(d)}"/>\n')
+
+    def close(self):
+        self.f.write("</g>\n</svg>\n")
+
+class DxfWriter:
+    """
+    Write cut edges as DXF LINE and SPLINE entities. Each jigsaw edge
+    becomes one cubic B-spline whose knots are tripled at the segment joins,
+    which is exactly the piecewise Bézier curve (nothing is flattened).
+    DXF's y axis points up, so y is flipped.
+
+    SPLINE needs DXF R2000 (AC1015), and R2000 readers such as AutoCAD
+    insist on handles and the standard tables, blocks and objects, so the
+    smallest such skeleton is written around the entities. $HANDSEED comes
+    first in the file, so the number of entities must be known up front.
+    """
+
+    def __init__(self, f, width, height, entities, scale=SCALE, unit=UNIT):
+        self.f = f
+        self.scale = scale
+        self.height = height
+        self.handle = 0
+
+        tables = self.tables()
+        blocks = self.blocks()
+        self.objects_dict = self.new_handle()
+        self.group_dict = self.new_handle()
+        self.last_handle = self.handle + entities
+
+        f.write(
+            "0\nSECTION\n2\nHEADER\n"
+            "9\n$ACADVER\n1\nAC1015\n"
+            f"9\n$HANDSEED\n5\n{self.last_handle + 1:X}\n"
+            f"9\n$INSUNITS\n70\n{DXF_UNITS.get(unit, 0)}\n"
+            "0\nENDSEC\n"
+            "0\nSECTION\n2\nCLASSES\n0\nENDSEC\n"
+            + tables + blocks +
+            "0\nSECTION\n2\nENTITIES\n"
+        )
+
+    def new_handle(self):
+        self.handle += 1
+        return f"{self.handle:X}"
+
+    def table(self, name, records, subclass=""):
+        """
+        One symbol table; records = [(subclass marker, group codes)].
+        DIMSTYLE records carry their handle in group 105 instead of 5.
+        """
+        table = self.new_handle()
+        handle_code = 105 if name == "DIMSTYLE" else 5
+        out = [
+            f"0\nTABLE\n2\n{name}\n5\n{table}\n330\n0\n100\nAcDbSymbolTable\n"
+            f"70\n{len(records)}\n{subclass}"
+        ]
+        for record_class, codes in records:
+            out.append(
+                f"0\n{name}\n{handle_code}\n{self.new_handle()}\n330\n{table}\n"
+                f"100\nAcDbSymbolTableRecord\n100\n{record_class}\n{codes}"
+            )
+        out.append("0\nENDTAB\n")
+        return "".join(out)
+
+    def tables(self):
+        linetype = "70\n0\n3\n\n72\n65\n73\n0\n40\n0.0\n"
+        out = [
+            "0\nSECTION\n2\nTABLES\n",
+            self.table("VPORT", []),
+            self.table("LTYPE", [
+                ("AcDbLinetypeTableRecord", f"2\n{name}\n{linetype}")
+                for name in ("ByBlock", "ByLayer", "Continuous")
+            ]),
+            self.table("LAYER", [
+                ("AcDbLayerTableRecord", f"2\n{name}\n70\n0\n62\n{color}\n6\nContinuous\n")
+                for name, color in (("0", 7), ("CUT", 1))
+            ]),
+            self.table("STYLE", [(
+                "AcDbTextStyleTableRecord",
+                "2\nStandard\n70\n0\n40\n0.0\n41\n1.0\n50\n0.0\n71\n0\n42\n2.5\n3\ntxt\n4\n\n",
+            )]),
+            self.table("VIEW", []),
+            self.table("UCS", []),
+            self.table("APPID", [("AcDbRegAppTableRecord", "2\nACAD\n70\n0\n")]),
+            self.table(
+                "DIMSTYLE",
+                [("AcDbDimStyleTableRecord", "2\nStandard\n70\n0\n")],
+                "100\nAcDbDimStyleTable\n",
+            ),
+        ]
+        # Block records: remember their handles, the blocks and entities point at them
+        first = self.handle + 2
+        out.append(self.table("BLOCK_RECORD", [
+            ("AcDbBlockTableRecord", f"2\n{name}\n")
+            for name in ("*Model_Space", "*Paper_Space")
+        ]))
+        self.block_records = {"*Model_Space": f"{first:X}", "*Paper_Space": f"{first + 1:X}"}
+        out.append("0\nENDSEC\n")
+        return "".join(out)
+
+    def blocks(self):
+        out = ["0\nSECTION\n2\nBLOCKS\n"]
+        for name, paper in (("*Model_Space", ""), ("*Paper_Space", "67\n1\n")):
+            owner = self.block_records[name]
+            out.append(
+                f"0\nBLOCK\n5\n{self.new_handle()}\n330\n{owner}\n100\nAcDbEntity\n{paper}8\n0\n"
+                f"100\nAcDbBlockBegin\n2\n{name}\n70\n0\n10\n0.0\n20\n0.0\n30\n0.0\n"
+                f"3\n{name}\n1\n\n"
+                f"0\nENDBLK\n5\n{self.new_handle()}\n330\n{owner}\n100\nAcDbEntity\n{paper}8\n0\n"
+                "100\nAcDbBlockEnd\n"
+            )
+        out.append("0\nENDSEC\n")
+        return "".join(out)
+
+    def entity(self, kind):
+        if self.handle >= self.last_handle:
+            raise ValueError("more DXF entities than announced")
+        return (
+            f"0\n{kind}\n5\n{self.new_handle()}\n330\n{self.block_records['*Model_Space']}\n"
+            "100\nAcDbEntity\n8\nCUT\n"
+        )
+
+    def point(self, p, code=10):
+        x = p[0] * self.scale
+        y = (self.height - p[1]) * self.scale
+        return f"{code}\n{x:.4f}\n{code + 10}\n{y:.4f}\n{code + 20}\n0.0\n"
+
+    def line(self, p0, p1):
+        self.f.write(self.entity("LINE") + "100\nAcDbLine\n" + self.point(p0, 10) + self.point(p1, 11))
+
+    def curve(self, segments):
+        count = len(segments)
+        knots = [0] * 4
+        for i in range(1, count):
+            knots += [i] * 3
+        knots += [count] * 4
+        controls = [segments[0][0]]
+        for _, c1, c2, end in segments:
+            controls += [c1, c2, end]
+
+        out = [
+            self.entity("SPLINE"),
+            "100\nAcDbSpline\n210\n0.0\n220\n0.0\n230\n1.0\n",
+            f"70\n8\n71\n3\n72\n{len(knots)}\n73\n{len(controls)}\n74\n0\n",
+        ]
+        out += [f"40\n{k}\n" for k in knots]
+        out += [self.point(p) for p in controls]
+        self.f.write("".join(out))
+
+    def close(self):
+        # Root dictionary with the group dictionary AutoCAD expects
+        self.f.write(
+            "0\nENDSEC\n"
+            "0\nSECTION\n2\nOBJECTS\n"
+            f"0\nDICTIONARY\n5\n{self.objects_dict}\n330\n0\n100\nAcDbDictionary\n281\n1\n"
+            f"3\nACAD_GROUP\n350\n{self.group_dict}\n"
+            f"0\nDICTIONARY\n5\n{self.group_dict}\n330\n{self.objects_dict}\n"
+            "100\nAcDbDictionary\n281\n1\n"
+            "0\nENDSEC\n0\nEOF\n"
+        )
+
+###############################################################################
+# EXPORT
+###############################################################################
+
+def cut_edge_count(rows, cols):
+    """
+    Number of edges iter_cut_edges yields: the border plus every interior edge.
+    """
+    return 4 + (rows - 1) * cols + rows * (cols - 1)
+
+def export(width, height, rows, cols, seed, writers, jitter=None):
+    """
+    Stream each cut edge of the layout to every writer, one edge at a time.
+    jitter = optional (tab_jitter, side_jitter) from jitter_layout
+    Returns the number of edges written.
+    """
+    count = 0
+    edges = iter_cut_edges(width, height, rows, cols, random.Random(seed), jitter)
+    for kind, geometry in edges:
+        for writer in writers:
+            if kind == "line":
+                writer.line(*geometry)
+            else:
+                writer.curve(geometry)
+        count += 1
+    for writer in writers:
+        writer.close()
+    return count
+
+def main():
+    # Only the header is read; the pixels are never decoded
+    with Image.open(IMAGE_PATH) as image:
+        width, height = image.size
+
+    files = []
+    writers = []
+    try:
+        if SVG_PATH:
+            files.append(open(SVG_PATH, "w"))
+            writers.append(SvgWriter(files[-1], width, height))
+        if DXF_PATH:
+            files.append(open(DXF_PATH, "w"))
+            writers.append(DxfWriter(files[-1], width, height, cut_edge_count(ROWS, COLS)))
+        jitter = None
+        if JITTER:
+            jitter = jitter_layout(width, height, ROWS, COLS, random.Random(JITTER_SEED))
+        count = export(width, height, ROWS, COLS, SEED, writers, jitter)
+    finally:
+        for f in files:
+            f.close()
+
+    print(f"{count} cut edges exported to {', '.join(p for p in (SVG_PATH, DXF_PATH) if p)}")
+
+###############################################################################
+# EXECUTE
+###############################################################################
+
+if __name__ == "__main__":
+    main()